@@ -1,34 +1,148 @@
 """The homee integration."""
 import asyncio
 import logging
+import os
+import time
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_USERNAME
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.const import ATTR_ENTITY_ID, CONF_HOST, CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse, callback
 from homeassistant.helpers import device_registry as dr
+import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entity import Entity
-from pymee import Homee
 from pymee.model import HomeeAttribute, HomeeNode
 from pymee.const import AttributeType, NodeProfile
 import voluptuous as vol
 
-from .helpers import get_attribute_for_enum
+from .compact import get_raw_data
+from .connection import CommandQueue, HomeeConnection
+from .events import AttributeEventFilter
+from .fanout import FanoutHub, async_register_view
+from .history import async_import_history
+from .io_thread import HomeeIOThread
+from .helpers import (
+    ATTRIBUTE_TYPE_NAMES,
+    SetupTimer,
+    get_attribute_for_enum,
+    get_homee_data,
+    get_ws_options,
+)
 from .const import (
     ATTR_ATTRIBUTE,
+    ATTR_ATTRIBUTES,
+    ATTR_DAYS,
+    ATTR_FILE,
+    ATTR_HOMEEGRAM,
     ATTR_NODE,
+    ATTR_PAGE_SIZE,
+    ATTR_RESTART,
+    ATTR_SECONDS,
+    ATTR_SPEED,
+    ATTR_TOP,
+    ATTR_TYPE,
     ATTR_VALUE,
+    ATTR_VALUES,
     CONF_ADD_HOME_DATA,
+    CONF_COMMAND_QUEUE_MAX_AGE,
+    CONF_COMMAND_QUEUE_SIZE,
+    CONF_COMPACT_MODEL,
+    CONF_FANOUT,
+    CONF_FIRE_EVENTS,
     CONF_INITIAL_OPTIONS,
+    CONF_IO_THREAD,
+    CONF_RECORD_TRAFFIC,
+    DEFAULT_COMMAND_QUEUE_MAX_AGE,
+    DEFAULT_COMMAND_QUEUE_SIZE,
+    DEFAULT_COMPACT_MODEL,
+    DEFAULT_FANOUT,
+    DEFAULT_IO_THREAD,
     DOMAIN,
+    SERVICE_GET_VALUES,
+    SERVICE_IMPORT_HISTORY,
+    SERVICE_PLAY_HOMEEGRAM,
+    SERVICE_PROFILE,
+    SERVICE_REPLAY_TRAFFIC,
     SERVICE_SET_VALUE,
+    SERVICE_SET_VALUES,
+    TRAFFIC_RECORDING_FILE,
+    UNAVAILABLE_NODE_STATES,
 )
+from .profiler import async_profile
+from .token_store import async_load_token, async_remove_token
+from .tracing import STAGE_ENTITY, STAGE_STATE_WRITTEN, CommandTrace
+from .traffic import TrafficRecorder, async_replay
 
 _LOGGER = logging.getLogger(__name__)
 
+# The items are validated once for the whole call
+SET_VALUES_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_VALUES): [
+            vol.Schema(
+                {
+                    vol.Required(ATTR_NODE): vol.Coerce(int),
+                    vol.Required(ATTR_ATTRIBUTE): vol.Coerce(int),
+                    vol.Required(ATTR_VALUE): vol.Coerce(float),
+                }
+            )
+        ]
+    }
+)
+
+
+def attribute_type(value) -> int:
+    """Validate an attribute type given as id or name."""
+    if isinstance(value, str) and value.upper() in ATTRIBUTE_TYPE_NAMES:
+        return ATTRIBUTE_TYPE_NAMES[value.upper()]
+    return vol.Coerce(int)(value)
+
+
+# An attribute is either given by its id or by the node and its type
+GET_VALUES_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ATTRIBUTES): [
+            vol.Any(
+                vol.Schema(
+                    {
+                        vol.Required(ATTR_ATTRIBUTE): vol.Coerce(int),
+                        vol.Optional(ATTR_NODE): vol.Coerce(int),
+                    }
+                ),
+                vol.Schema(
+                    {
+                        vol.Required(ATTR_NODE): vol.Coerce(int),
+                        vol.Required(ATTR_TYPE): attribute_type,
+                    }
+                ),
+            )
+        ]
+    }
+)
+
+# The import continues after the last point of each page, pages must not be empty
+IMPORT_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENTITY_ID): cv.entity_id,
+        vol.Optional(ATTR_DAYS, default=30): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional(ATTR_PAGE_SIZE, default=1000): vol.All(
+            vol.Coerce(int), vol.Range(min=1)
+        ),
+        vol.Optional(ATTR_RESTART, default=False): cv.boolean,
+    }
+)
+
 # TODO
 CONFIG_SCHEMA = vol.Schema({DOMAIN: vol.Schema({})}, extra=vol.ALLOW_EXTRA)
 
-PLATFORMS = ["light", "climate", "binary_sensor", "switch", "cover", "sensor"]
+PLATFORMS = [
+    "light",
+    "climate",
+    "binary_sensor",
+    "switch",
+    "cover",
+    "sensor",
+    "scene",
+]
 
 
 async def async_setup(hass: HomeAssistant, config: dict):
@@ -39,64 +153,208 @@ async def async_setup(hass: HomeAssistant, config: dict):
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Set up homee from a config entry."""
+    timer = SetupTimer()
+
     # Create the Homee api object using host, user, password & pymee instance from the config
-    homee = Homee(
+    homee = HomeeConnection(
         entry.data[CONF_HOST],
         entry.data[CONF_USERNAME],
         entry.data[CONF_PASSWORD],
         "pymee_" + hass.config.location_name,
+        # Keepalive pings are sent by websockets, see get_ws_options
+        pingInterval=0,
     )
+    homee.hass = hass
+    homee.setup_timer = timer
 
     # Migrate initial options
     if entry.options is None or entry.options == {}:
         options = entry.data.get(CONF_INITIAL_OPTIONS, {})
         hass.config_entries.async_update_entry(entry, options=options)
 
+    homee.ws_options = get_ws_options(entry.options)
+
+    # Receive and decode the messages of this homee on a dedicated thread
+    if entry.options.get(CONF_IO_THREAD, DEFAULT_IO_THREAD):
+        homee.io_thread = HomeeIOThread(f"homee_{entry.unique_id}")
+
+    homee.compact_model = entry.options.get(CONF_COMPACT_MODEL, DEFAULT_COMPACT_MODEL)
+
+    # Keep the commands set during short disconnects
+    queue_size = entry.options.get(CONF_COMMAND_QUEUE_SIZE, DEFAULT_COMMAND_QUEUE_SIZE)
+    if queue_size > 0:
+        homee.command_queue = CommandQueue(
+            queue_size,
+            entry.options.get(
+                CONF_COMMAND_QUEUE_MAX_AGE, DEFAULT_COMMAND_QUEUE_MAX_AGE
+            ),
+        )
+
+    # Re-broadcast the messages to local consumers
+    if entry.options.get(CONF_FANOUT, DEFAULT_FANOUT):
+        homee.fanout = FanoutHub()
+        async_register_view(hass)
+
+    # Reuse the stored access token while it is still valid
+    if entry.unique_id is not None:
+        homee.token_uid = entry.unique_id
+        stored_token = await async_load_token(hass, entry.unique_id)
+        if stored_token is not None and stored_token["expires"] > time.time():
+            homee.token = stored_token["token"]
+            homee.expires = stored_token["expires"]
+            homee.schedule_token_refresh()
+
+    # Fire homee_attribute_changed events for the configured attributes
+    if entry.options.get(CONF_FIRE_EVENTS, False):
+        homee.attribute_event_filter = AttributeEventFilter(entry.options)
+
+    # Record the raw websocket traffic if enabled
+    recording_path = hass.config.path(TRAFFIC_RECORDING_FILE.format(entry.entry_id))
+    if entry.options.get(CONF_RECORD_TRAFFIC, False):
+        homee.traffic_recorder = TrafficRecorder(hass, recording_path)
+        homee.traffic_recorder.async_start()
+
     # Start the homee websocket connection as a new task and wait until we are connected
-    hass.loop.create_task(homee.run())
-    await homee.wait_until_connected()
+    with timer.phase("connect"):
+        homee.start()
+        await homee.wait_until_connected()
+    timer.phases.update(homee.connection_timings)
 
     # Log info about nodes, to facilitate recognition of unknown nodes.
-    for node in homee.nodes:
-        _LOGGER.info(
-            "Found node %s, with following Data: %s",
-            node.name,
-            node._data,
-        )
+    # Only build the raw payloads if they are logged, the compact model pruned them.
+    with timer.phase("node_log"):
+        if _LOGGER.isEnabledFor(logging.INFO):
+            for node in homee.nodes:
+                _LOGGER.info(
+                    "Found node %s, with following Data: %s",
+                    node.name,
+                    get_raw_data(node),
+                )
 
     hass.data[DOMAIN][entry.entry_id] = homee
 
     # Register the set_value service that can be used for debugging and custom automations
-    def handle_set_value(call: ServiceCall):
+    async def handle_set_value(call: ServiceCall):
         """Handle the service call."""
         node = int(call.data.get(ATTR_NODE, 0))
         attribute = int(call.data.get(ATTR_ATTRIBUTE, 0))
         value = float(call.data.get(ATTR_VALUE, 0))
 
-        hass.async_create_task(homee.set_value(node, attribute, value))
+        homee.tracer.service_called(node, attribute, value, call.context.id)
+        await homee.set_value(node, attribute, value)
 
     hass.services.async_register(DOMAIN, SERVICE_SET_VALUE, handle_set_value)
 
-    # create device register entry
-    device_registry = dr.async_get(hass)
-    device_registry.async_get_or_create(
-        config_entry_id=entry.entry_id,
-        # TODO: figure out how to derive the MAC address - will need to update pymee?
-        # connections={(dr.CONNECTION_NETWORK_MAC, entry.mac)},
-        identifiers={(DOMAIN, homee.deviceId)},
-        manufacturer="homee",
-        name=homee.settings.homee_name,
-        model="homee",
-        sw_version=homee.settings.version,
-        hw_version="TBD",
+    # Register the set_values service that sends many values as one batch
+    async def handle_set_values(call: ServiceCall):
+        """Handle the service call."""
+        items = [
+            (item[ATTR_NODE], item[ATTR_ATTRIBUTE], item[ATTR_VALUE])
+            for item in call.data[ATTR_VALUES]
+        ]
+
+        return {"results": await homee.set_values(items)}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_VALUES,
+        handle_set_values,
+        schema=SET_VALUES_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    # Register the get_values service that reads values from the homee model
+    @callback
+    def handle_get_values(call: ServiceCall):
+        """Handle the service call."""
+        return {"values": homee.get_values(call.data[ATTR_ATTRIBUTES])}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_VALUES,
+        handle_get_values,
+        schema=GET_VALUES_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    # Register the play_homeegram service to run automations on the cube
+    async def handle_play_homeegram(call: ServiceCall):
+        """Handle the service call."""
+        homeegram = int(call.data.get(ATTR_HOMEEGRAM, 0))
+
+        await homee.play_homeegram(homeegram)
+
+    hass.services.async_register(DOMAIN, SERVICE_PLAY_HOMEEGRAM, handle_play_homeegram)
+
+    # Register the import_history service to backfill energy statistics
+    async def handle_import_history(call: ServiceCall):
+        """Handle the service call."""
+        return await async_import_history(
+            hass,
+            homee,
+            call.data[ATTR_ENTITY_ID],
+            call.data[ATTR_DAYS],
+            call.data[ATTR_PAGE_SIZE],
+            call.data[ATTR_RESTART],
+        )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_IMPORT_HISTORY,
+        handle_import_history,
+        schema=IMPORT_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    # Register the replay_traffic service that feeds a recording into the integration
+    async def handle_replay_traffic(call: ServiceCall):
+        """Handle the service call."""
+        path = call.data.get(ATTR_FILE, recording_path)
+        if not os.path.isabs(path):
+            path = hass.config.path(path)
+        speed = float(call.data.get(ATTR_SPEED, 1))
+
+        hass.async_create_task(async_replay(hass, homee, path, speed))
+
+    hass.services.async_register(DOMAIN, SERVICE_REPLAY_TRAFFIC, handle_replay_traffic)
+
+    # Register the profile service to find expensive callbacks and properties
+    async def handle_profile(call: ServiceCall):
+        """Handle the service call."""
+        seconds = float(call.data.get(ATTR_SECONDS, 30))
+        top = int(call.data.get(ATTR_TOP, 20))
+
+        return await async_profile(hass, seconds, top)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        handle_profile,
+        supports_response=SupportsResponse.OPTIONAL,
     )
 
-    # Forward entry setup to the platforms
-    for component in PLATFORMS:
-        hass.async_create_task(
-            hass.config_entries.async_forward_entry_setup(entry, component)
+    # create device register entry
+    with timer.phase("device_registry"):
+        device_registry = dr.async_get(hass)
+        device_registry.async_get_or_create(
+            config_entry_id=entry.entry_id,
+            # TODO: figure out how to derive the MAC address - will need to update pymee?
+            # connections={(dr.CONNECTION_NETWORK_MAC, entry.mac)},
+            identifiers={(DOMAIN, homee.deviceId)},
+            manufacturer="homee",
+            name=homee.settings.homee_name,
+            model="homee",
+            sw_version=homee.settings.version,
+            hw_version="TBD",
         )
 
+    # Forward entry setup to the platforms and wait until all entities are added
+    with timer.phase("platforms"):
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    timer.finish()
+    _LOGGER.debug("Set up homee %s: %s", entry.title, timer.summary())
+
     return True
 
 
@@ -113,18 +371,46 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     )
     if unload_ok:
         # Get Homee object and remove it from data
-        homee: Homee = hass.data[DOMAIN][entry.entry_id]
+        homee: HomeeConnection = hass.data[DOMAIN][entry.entry_id]
         hass.data[DOMAIN].pop(entry.entry_id)
 
-        # Schedule homee disconnect
-        homee.disconnect()
+        # Disconnect from homee and wait for the connection task to finish
+        await homee.async_disconnect()
+
+        if homee.fanout is not None:
+            homee.fanout.close()
+
+        # All entities should have removed their node listeners at this point
+        remaining_listeners = sum(len(n._onChangedListeners) for n in homee.nodes)
+        if remaining_listeners > 0:
+            _LOGGER.warning(
+                "%s node listeners were not removed while unloading homee %s",
+                remaining_listeners,
+                entry.title,
+            )
+
+        # Write the remaining recorded traffic
+        if homee.traffic_recorder is not None:
+            await homee.traffic_recorder.async_stop()
 
         # Remove services
         hass.services.async_remove(DOMAIN, SERVICE_SET_VALUE)
+        hass.services.async_remove(DOMAIN, SERVICE_SET_VALUES)
+        hass.services.async_remove(DOMAIN, SERVICE_GET_VALUES)
+        hass.services.async_remove(DOMAIN, SERVICE_PLAY_HOMEEGRAM)
+        hass.services.async_remove(DOMAIN, SERVICE_IMPORT_HISTORY)
+        hass.services.async_remove(DOMAIN, SERVICE_REPLAY_TRAFFIC)
+        hass.services.async_remove(DOMAIN, SERVICE_PROFILE)
 
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Remove the stored access token of a removed homee config entry."""
+    if entry.unique_id is not None:
+        await async_remove_token(hass, entry.unique_id)
+
+
 class HomeeNodeEntity:
     """Representation of a Node in Homee."""
 
@@ -135,16 +421,23 @@ class HomeeNodeEntity:
         self._clear_node_listener = None
         self._unique_id = node.id
         self._entry = entry
+        self._homee: HomeeConnection = None
+        self._published_values = {}
+        self._published_available = True
 
-        self._homee_data = {
-            "id": node.id,
-            "name": node.name,
-            "profile": node.profile,
-            "attributes": [{"id": a.id, "type": a.type} for a in node.attributes],
-        }
+        # Bumped with every published change, see helpers.derived_state_property
+        self._state_version = 0
+        self._derived_state: dict[str, tuple] = {}
+
+        # Shared by all entities of the node
+        self._homee_data = get_homee_data(node)
 
     async def async_added_to_hass(self) -> None:
         """Add the homee binary sensor device to home assistant."""
+        self._homee = self._entity.hass.data[DOMAIN][self._entry.entry_id]
+        self._published_values = {a.id: a.current_value for a in self._node.attributes}
+        self._published_available = self.available
+        self._state_version += 1
         self.register_listener()
 
     async def async_will_remove_from_hass(self):
@@ -173,6 +466,11 @@ class HomeeNodeEntity:
             "via_device": (DOMAIN, self._entry.entry_id),
         }
 
+    @property
+    def available(self) -> bool:
+        """Return True if homee can reach the node."""
+        return self._node.state not in UNAVAILABLE_NODE_STATES
+
     @property
     def should_poll(self) -> bool:
         """Return if the entity should poll."""
@@ -191,7 +489,7 @@ class HomeeNodeEntity:
     @property
     def raw_data(self):
         """Return the raw data of the node."""
-        return self._node._data
+        return get_raw_data(self._node)
 
     @property
     def state_attributes(self):
@@ -218,6 +516,7 @@ class HomeeNodeEntity:
         """Clear the on_changed listener on the node."""
         if self._clear_node_listener is not None:
             self._clear_node_listener()
+            self._clear_node_listener = None
 
     def attribute(self, attributeType):
         """Try to get the current value of the attribute of the given type."""
@@ -240,6 +539,7 @@ class HomeeNodeEntity:
 
     async def async_set_value_by_id(self, attribute_id: int, value: float):
         """Set an attribute value on the homee node."""
+        self._homee.tracer.start(self._node.id, attribute_id, value, STAGE_ENTITY)
         await self._entity.hass.services.async_call(
             DOMAIN,
             SERVICE_SET_VALUE,
@@ -251,7 +551,31 @@ class HomeeNodeEntity:
         )
 
     def _on_node_updated(self, node: HomeeNode, attribute: HomeeAttribute):
-        self._entity.schedule_update_ha_state()
+        # homee repeats the full state after every reconnect, only write the
+        # state if a value or the availability changed since it was last published.
+        available = self.available
+        if (
+            self._published_values.get(attribute.id) == attribute.current_value
+            and self._published_available == available
+        ):
+            self._homee.suppressed_state_writes += 1
+            return
+
+        self._published_values[attribute.id] = attribute.current_value
+        self._published_available = available
+        self._state_version += 1
+        self._homee.state_writes += 1
+
+        trace = self._homee.tracer.writing
+        if trace is not None and trace.attribute_id == attribute.id:
+            self._entity.hass.async_create_task(self._async_write_traced_state(trace))
+        else:
+            self._entity.schedule_update_ha_state()
+
+    async def _async_write_traced_state(self, trace: CommandTrace):
+        """Write the state confirming a traced command and mark the trace."""
+        await self._entity.async_update_ha_state()
+        trace.mark(STAGE_STATE_WRITTEN)
 
 
 class AttributeNotFoundException(Exception):
@@ -0,0 +1,262 @@
+"""Aggregates of an attribute type across the nodes of a homee group."""
+import logging
+import math
+from typing import Callable
+
+from homeassistant.core import callback
+from pymee.const import AttributeType
+from pymee.model import HomeeAttribute, HomeeGroup, HomeeNode
+
+from .connection import HomeeConnection
+from .const import (
+    CONF_AGGREGATE_ATTRIBUTE_TYPES,
+    CONF_AGGREGATE_GROUPS,
+    DEFAULT_AGGREGATE_ATTRIBUTE_TYPES,
+    DOMAIN,
+)
+from .helpers import ATTRIBUTE_TYPE_NAMES, parse_id_list
+
+_LOGGER = logging.getLogger(__name__)
+
+BINARY_ATTRIBUTES = [
+    AttributeType.ON_OFF,
+    AttributeType.OPEN_CLOSE,
+    AttributeType.LOCK_STATE,
+]
+
+FUNCTION_SUM = "sum"
+FUNCTION_MIN = "min"
+FUNCTION_MAX = "max"
+FUNCTION_ANY = "any"
+FUNCTION_ALL = "all"
+
+ATTRIBUTE_TYPE_NAMES_BY_TYPE = {val: key for key, val in ATTRIBUTE_TYPE_NAMES.items()}
+
+
+class GroupAggregate:
+    """Maintain the sum, min, max, any and all of an attribute type in a group.
+
+    The aggregate is updated from the node listeners. An update costs O(1), only
+    min and max are recalculated once the value holding them changes. The running
+    sum is recalculated with math.fsum after as many updates as there are values,
+    so rounding errors do not add up. The group members are taken when the
+    aggregate is created.
+    """
+
+    def __init__(self, group: HomeeGroup, attribute_type: int) -> None:
+        """Initialize the aggregate from the current attribute values."""
+        self.group = group
+        self.attribute_type = attribute_type
+        self.attributes: list[HomeeAttribute] = [
+            a
+            for node in group.nodes
+            for a in node.attributes
+            if a.type == attribute_type
+        ]
+
+        self._values: dict[int, float] = {}
+        self._sum = 0.0
+        self._sum_updates = 0
+        self._on_count = 0
+        self._min = self._max = None
+        self._extremes_valid = False
+        for attribute in self.attributes:
+            self._add(attribute.id, attribute.current_value)
+
+        self._listeners: list[Callable] = []
+        self._clear_node_listeners: list[Callable] = []
+
+    @property
+    def sum(self) -> float:
+        """The sum of all values."""
+        return self._sum
+
+    @property
+    def min(self) -> float:
+        """The smallest value."""
+        self._update_extremes()
+        return self._min
+
+    @property
+    def max(self) -> float:
+        """The largest value."""
+        self._update_extremes()
+        return self._max
+
+    @property
+    def any(self) -> bool:
+        """True if any value is on."""
+        return self._on_count > 0
+
+    @property
+    def all(self) -> bool:
+        """True if all values are on."""
+        return bool(self._values) and self._on_count == len(self._values)
+
+    def value(self, function: str):
+        """Return the value of an aggregate function."""
+        return getattr(self, function)
+
+    def update(self, attribute_id: int, value: float) -> bool:
+        """Update the value of an attribute. Returns True if it changed."""
+        old_value = self._values.get(attribute_id)
+        if old_value == value:
+            return False
+
+        self._remove(attribute_id, old_value)
+        self._add(attribute_id, value)
+
+        self._sum_updates += 1
+        if self._on_count == 0:
+            # All values are zero, drop the rounding errors without a recalculation
+            self._sum = 0.0
+        elif self._sum_updates >= len(self._values):
+            self._update_sum()
+        return True
+
+    def _add(self, attribute_id: int, value: float):
+        self._values[attribute_id] = value
+        self._sum += value
+        if value:
+            self._on_count += 1
+
+        if self._extremes_valid:
+            if value < self._min:
+                self._min = value
+            if value > self._max:
+                self._max = value
+
+    def _remove(self, attribute_id: int, value: float):
+        if value is None:
+            return
+
+        del self._values[attribute_id]
+        self._sum -= value
+        if value:
+            self._on_count -= 1
+
+        # Values are not counted, so removing an extreme invalidates it
+        if value in (self._min, self._max):
+            self._extremes_valid = False
+
+    def _update_sum(self):
+        self._sum = math.fsum(self._values.values())
+        self._sum_updates = 0
+
+    def _update_extremes(self):
+        if self._extremes_valid or not self._values:
+            return
+        self._min = min(self._values.values())
+        self._max = max(self._values.values())
+        self._extremes_valid = True
+        # The values are iterated anyway
+        self._update_sum()
+
+    @callback
+    def add_listener(self, listener: Callable) -> Callable:
+        """Call the listener if the aggregate changed.
+
+        The node listeners are only registered while the aggregate has listeners.
+        """
+        if not self._listeners:
+            # Catch up with the changes made while nobody was listening
+            for attribute in self.attributes:
+                self.update(attribute.id, attribute.current_value)
+
+            nodes = {a.node_id for a in self.attributes}
+            self._clear_node_listeners = [
+                node.add_on_changed_listener(self._on_node_updated)
+                for node in self.group.nodes
+                if node.id in nodes
+            ]
+        self._listeners.append(listener)
+
+        def remove_listener():
+            self._listeners.remove(listener)
+            if not self._listeners:
+                for clear_node_listener in self._clear_node_listeners:
+                    clear_node_listener()
+                self._clear_node_listeners = []
+
+        return remove_listener
+
+    def _on_node_updated(self, node: HomeeNode, attribute: HomeeAttribute):
+        if attribute.type != self.attribute_type:
+            return
+        if self.update(attribute.id, attribute.current_value):
+            for listener in self._listeners:
+                listener()
+
+
+def get_group_aggregates(
+    homee: HomeeConnection, options: dict, binary: bool
+) -> list[GroupAggregate]:
+    """Create the aggregates for the configured groups and attribute types.
+
+    Only aggregates of binary or of numeric attribute types are returned.
+    """
+    attribute_types = parse_id_list(
+        options.get(CONF_AGGREGATE_ATTRIBUTE_TYPES, DEFAULT_AGGREGATE_ATTRIBUTE_TYPES),
+        ATTRIBUTE_TYPE_NAMES,
+    )
+    attribute_types = [t for t in attribute_types if (t in BINARY_ATTRIBUTES) == binary]
+    group_ids = {int(g) for g in options.get(CONF_AGGREGATE_GROUPS, [])}
+
+    aggregates = []
+    for group in homee.groups:
+        if group.id not in group_ids:
+            continue
+        for attribute_type in attribute_types:
+            aggregate = GroupAggregate(group, attribute_type)
+            if aggregate.attributes:
+                aggregates.append(aggregate)
+    return aggregates
+
+
+class GroupAggregateEntity:
+    """Representation of an aggregate function of a homee group.
+
+    Used as a mixin with the entity class of the platform.
+    """
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+
+    def __init__(
+        self, homee: HomeeConnection, aggregate: GroupAggregate, function: str
+    ) -> None:
+        """Initialize the entity of an aggregate function."""
+        self._aggregate = aggregate
+        self._function = function
+        self._clear_aggregate_listener = None
+
+        type_name = ATTRIBUTE_TYPE_NAMES_BY_TYPE.get(aggregate.attribute_type, "")
+        self._attr_name = (
+            f"{aggregate.group.name} {type_name.lower().replace('_', ' ')} {function}"
+        )
+        # Group ids are only unique on one homee
+        self._attr_unique_id = (
+            f"{homee.settings.uid}-group-{aggregate.group.id}"
+            f"-{function}-{aggregate.attribute_type}"
+        )
+        self._attr_device_info = {"identifiers": {(DOMAIN, homee.deviceId)}}
+
+    async def async_added_to_hass(self) -> None:
+        """Start listening to the aggregate."""
+        self._clear_aggregate_listener = self._aggregate.add_listener(
+            self.async_write_ha_state
+        )
+
+    async def async_will_remove_from_hass(self):
+        """Stop listening to the aggregate."""
+        if self._clear_aggregate_listener is not None:
+            self._clear_aggregate_listener()
+            self._clear_aggregate_listener = None
+
+    @property
+    def extra_state_attributes(self):
+        """Return the homee group and the number of aggregated attributes."""
+        return {
+            "homee_group_id": self._aggregate.group.id,
+            "attribute_count": len(self._aggregate.attributes),
+        }
@@ -12,21 +12,29 @@ from pymee.const import AttributeType, NodeProfile
 from pymee.model import HomeeNode
 
 from . import HomeeNodeEntity, helpers
-from .const import CONF_DOOR_GROUPS, CONF_WINDOW_GROUPS
+from .aggregates import (
+    FUNCTION_ALL,
+    FUNCTION_ANY,
+    GroupAggregate,
+    GroupAggregateEntity,
+    get_group_aggregates,
+)
+from .connection import HomeeConnection
+from .const import CONF_DOOR_GROUPS, CONF_WINDOW_GROUPS, DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
 
 
-def get_device_class(node: HomeeNodeEntity) -> int:
+def get_device_class(node: HomeeNode) -> int:
     """Determine the device class a homee node based on the available attributes."""
     device_class = BinarySensorDeviceClass.OPENING
     state_attr = AttributeType.OPEN_CLOSE
 
-    if node.has_attribute(AttributeType.ON_OFF):
+    if AttributeType.ON_OFF in node._attribute_map:
         state_attr = AttributeType.ON_OFF
         device_class = BinarySensorDeviceClass.PLUG
 
-    if node.has_attribute(AttributeType.LOCK_STATE):
+    if AttributeType.LOCK_STATE in node._attribute_map:
         state_attr = AttributeType.LOCK_STATE
         device_class = BinarySensorDeviceClass.LOCK
 
@@ -43,14 +51,28 @@ def is_binary_sensor_node(node: HomeeNode):
     ]
 
 
+@helpers.timed_platform_setup
 async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_devices):
     """Add the homee platform for the binary sensor integration."""
 
     devices = []
+    rules = helpers.ImportRules(config_entry.options)
     for node in helpers.get_imported_nodes(hass, config_entry):
         if not is_binary_sensor_node(node):
             continue
+        if not rules.includes_attribute_type(get_device_class(node)[1]):
+            continue
         devices.append(HomeeBinarySensor(node, config_entry))
+
+    homee: HomeeConnection = hass.data[DOMAIN][config_entry.entry_id]
+    for aggregate in get_group_aggregates(homee, config_entry.options, binary=True):
+        for function in [FUNCTION_ANY, FUNCTION_ALL]:
+            devices.append(
+                HomeeGroupAggregateBinarySensor(
+                    homee, aggregate, function, config_entry
+                )
+            )
+
     if devices:
         async_add_devices(devices)
 
@@ -80,7 +102,7 @@ class HomeeBinarySensor(HomeeNodeEntity, BinarySensorEntity):
         """Configure the device class of the sensor"""
 
         # Get the initial device class and state attribute
-        self._device_class, self._state_attr = get_device_class(self)
+        self._device_class, self._state_attr = get_device_class(self._node)
 
         # Set Window/Door device class based on configured groups
         if any(
@@ -103,3 +125,34 @@ class HomeeBinarySensor(HomeeNodeEntity, BinarySensorEntity):
     def device_class(self):
         """Return the class of this device, from component DEVICE_CLASSES."""
         return self._device_class
+
+
+class HomeeGroupAggregateBinarySensor(GroupAggregateEntity, BinarySensorEntity):
+    """Representation of any or all binary states of an attribute type in a homee group."""
+
+    def __init__(
+        self,
+        homee: HomeeConnection,
+        aggregate: GroupAggregate,
+        function: str,
+        entry: ConfigEntry,
+    ) -> None:
+        """Initialize a homee group aggregate binary sensor."""
+        GroupAggregateEntity.__init__(self, homee, aggregate, function)
+
+        group_id = str(aggregate.group.id)
+        if aggregate.attribute_type == AttributeType.ON_OFF:
+            self._attr_device_class = BinarySensorDeviceClass.POWER
+        elif aggregate.attribute_type == AttributeType.LOCK_STATE:
+            self._attr_device_class = BinarySensorDeviceClass.LOCK
+        elif group_id in entry.options.get(CONF_WINDOW_GROUPS, []):
+            self._attr_device_class = BinarySensorDeviceClass.WINDOW
+        elif group_id in entry.options.get(CONF_DOOR_GROUPS, []):
+            self._attr_device_class = BinarySensorDeviceClass.DOOR
+        else:
+            self._attr_device_class = BinarySensorDeviceClass.OPENING
+
+    @property
+    def is_on(self):
+        """Return true if any or all of the binary states are on."""
+        return self._aggregate.value(self._function)
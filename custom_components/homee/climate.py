@@ -38,14 +38,18 @@ def get_climate_features(node: HomeeNodeEntity, default=0) -> int:
     return features
 
 
+@helpers.timed_platform_setup
 async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_devices):
     """Add the homee platform for the light integration."""
     # homee: Homee = hass.data[DOMAIN][config_entry.entry_id]
 
     devices = []
+    rules = helpers.ImportRules(config_entry.options)
     for node in helpers.get_imported_nodes(hass, config_entry):
         if not is_climate_node(node):
             continue
+        if not rules.includes_attribute_type(AttributeType.TARGET_TEMPERATURE):
+            continue
         devices.append(HomeeClimate(node, config_entry))
     if devices:
         async_add_devices(devices)
@@ -0,0 +1,214 @@
+"""Compact representation of the node and attribute data kept by pymee.
+
+pymee keeps the decoded json of every node and attribute and reads its
+properties from these dicts. With many nodes most of the memory goes into the
+per-payload dicts, repeated strings and option dicts, and the attribute list of
+each node payload that pymee keeps after it created the attributes.
+"""
+from collections.abc import Mapping
+import sys
+
+from pymee.model import HomeeNode
+
+NODE_FIELDS = (
+    "id",
+    "name",
+    "profile",
+    "image",
+    "favorite",
+    "order",
+    "protocol",
+    "routing",
+    "state",
+    "state_changed",
+    "added",
+    "history",
+    "cube_type",
+    "note",
+    "services",
+    "phonetic_name",
+    "owner",
+    "security",
+    "attributes",
+)
+ATTRIBUTE_FIELDS = (
+    "id",
+    "node_id",
+    "instance",
+    "minimum",
+    "maximum",
+    "current_value",
+    "target_value",
+    "last_value",
+    "unit",
+    "step_value",
+    "editable",
+    "type",
+    "state",
+    "last_changed",
+    "changed_by",
+    "changed_by_id",
+    "based_on",
+    "name",
+    "data",
+    "options",
+)
+
+
+class CompactData(Mapping):
+    """Read-only payload that keeps the known fields in slots.
+
+    Fields that are not known are kept in a dict. Use full() to get the payload
+    as a plain dict again, e.g. for diagnostics.
+    """
+
+    __slots__ = ("_extra",)
+    FIELDS: tuple[str, ...] = ()
+    FIELD_SET: frozenset[str] = frozenset()
+
+    def __init__(self, data: dict) -> None:
+        """Store the fields of a decoded payload."""
+        self._extra = None
+        for key, value in data.items():
+            if key in self.FIELD_SET:
+                setattr(self, key, _intern(value))
+            else:
+                if self._extra is None:
+                    self._extra = {}
+                self._extra[sys.intern(key)] = _intern(value)
+
+    def __getitem__(self, key: str):
+        if key in self.FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __iter__(self):
+        for key in self.FIELDS:
+            if hasattr(self, key):
+                yield key
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return repr(self.full())
+
+    def full(self) -> dict:
+        """Return the payload as a plain dict."""
+        return dict(self)
+
+
+class CompactAttribute(CompactData):
+    """Compact payload of an attribute.
+
+    Option dicts are only read, equal ones are shared through the given dict,
+    which is kept by the connection.
+    """
+
+    __slots__ = ATTRIBUTE_FIELDS
+    FIELDS = ATTRIBUTE_FIELDS
+    FIELD_SET = frozenset(ATTRIBUTE_FIELDS)
+
+    def __init__(self, data: dict, shared_options: dict[str, dict]) -> None:
+        """Store the fields of an attribute and share its options."""
+        super().__init__(data)
+        if hasattr(self, "options"):
+            key = repr(self.options)
+            self.options = shared_options.setdefault(key, self.options)
+        # Avoid separate float objects for the usual case of equal values
+        if hasattr(self, "current_value"):
+            for key in ("target_value", "last_value"):
+                if getattr(self, key, None) == self.current_value:
+                    setattr(self, key, self.current_value)
+
+
+class CompactNode(CompactData):
+    """Compact payload of a node."""
+
+    __slots__ = NODE_FIELDS
+    FIELDS = NODE_FIELDS
+    FIELD_SET = frozenset(NODE_FIELDS)
+
+    def __init__(self, data: dict, shared_options: dict[str, dict]) -> None:
+        """Store the fields of a node and compact its attributes."""
+        super().__init__(
+            {
+                **data,
+                "attributes": [
+                    compact_attribute(a, shared_options) for a in data["attributes"]
+                ],
+            }
+            if "attributes" in data
+            else data
+        )
+
+
+def _intern(value):
+    # Units, names and option keys repeat across thousands of attributes
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, dict):
+        return {sys.intern(k): _intern(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_intern(v) for v in value]
+    return value
+
+
+def compact_node(data: dict, shared_options: dict[str, dict]) -> CompactNode:
+    """Compact a node payload and its attributes."""
+    if isinstance(data, CompactNode):
+        return data
+    return CompactNode(data, shared_options)
+
+
+def compact_attribute(data: dict, shared_options: dict[str, dict]) -> CompactAttribute:
+    """Compact an attribute payload."""
+    if isinstance(data, CompactAttribute):
+        return data
+    return CompactAttribute(data, shared_options)
+
+
+def compact_message(msg: dict, shared_options: dict[str, dict]) -> dict:
+    """Compact the node and attribute payloads of a homee message in place."""
+    if "all" in msg:
+        msg["all"]["nodes"] = [
+            compact_node(n, shared_options) for n in msg["all"]["nodes"]
+        ]
+    elif "nodes" in msg:
+        msg["nodes"] = [compact_node(n, shared_options) for n in msg["nodes"]]
+    elif "node" in msg:
+        msg["node"] = compact_node(msg["node"], shared_options)
+    elif "attribute" in msg:
+        msg["attribute"] = compact_attribute(msg["attribute"], shared_options)
+    return msg
+
+
+def prune_nodes(nodes: list[HomeeNode]):
+    """Drop the attribute payloads pymee keeps in the node payloads.
+
+    pymee only reads them when it creates the attributes of a node, afterwards
+    they are outdated by the attribute updates.
+    """
+    for node in nodes:
+        if isinstance(node._data, CompactNode) and hasattr(node._data, "attributes"):
+            del node._data.attributes
+
+
+def get_raw_data(node: HomeeNode) -> dict:
+    """Return the payload of a node with the current payloads of its attributes."""
+    if not isinstance(node._data, CompactNode):
+        return node._data
+
+    data = node._data.full()
+    data["attributes"] = [
+        a._data.full() if isinstance(a._data, CompactData) else a._data
+        for a in node.attributes
+    ]
+    return data
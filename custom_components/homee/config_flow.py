@@ -17,12 +17,45 @@ import voluptuous as vol
 
 from .const import (
     CONF_ADD_HOME_DATA,
+    CONF_AGGREGATE_ATTRIBUTE_TYPES,
+    CONF_AGGREGATE_GROUPS,
+    CONF_COMMAND_QUEUE_MAX_AGE,
+    CONF_COMMAND_QUEUE_SIZE,
+    CONF_COMPACT_MODEL,
     CONF_DOOR_GROUPS,
+    CONF_EVENT_ATTRIBUTE_TYPES,
+    CONF_EVENT_GROUPS,
+    CONF_EVENT_NODES,
+    CONF_EXCLUDE_ATTRIBUTE_TYPES,
+    CONF_EXCLUDE_GROUPS,
+    CONF_EXCLUDE_PROFILES,
+    CONF_FANOUT,
+    CONF_FIRE_EVENTS,
     CONF_GROUPS,
+    CONF_INCLUDE_PROFILES,
     CONF_INITIAL_OPTIONS,
+    CONF_IO_THREAD,
+    CONF_RECORD_TRAFFIC,
     CONF_WINDOW_GROUPS,
+    CONF_WS_COMPRESSION,
+    CONF_WS_MAX_MESSAGE_SIZE,
+    CONF_WS_MAX_QUEUE,
+    CONF_WS_PING_INTERVAL,
+    CONF_WS_PING_TIMEOUT,
+    DEFAULT_AGGREGATE_ATTRIBUTE_TYPES,
+    DEFAULT_COMMAND_QUEUE_MAX_AGE,
+    DEFAULT_COMMAND_QUEUE_SIZE,
+    DEFAULT_COMPACT_MODEL,
+    DEFAULT_FANOUT,
+    DEFAULT_IO_THREAD,
+    DEFAULT_WS_COMPRESSION,
+    DEFAULT_WS_MAX_MESSAGE_SIZE,
+    DEFAULT_WS_MAX_QUEUE,
+    DEFAULT_WS_PING_INTERVAL,
+    DEFAULT_WS_PING_TIMEOUT,
     DOMAIN,
 )
+from .token_store import async_save_token
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -35,30 +68,133 @@ DATA_SCHEMA = schema = vol.Schema(
 )
 
 
-def get_options_schema(homee: Homee, default_options={}):
+def get_options_schema(homee: Homee, default_options={}, advanced=False):
     groups = [str(g.id) for g in homee.groups]
     groups_selection = {str(g.id): f"{g.name} ({len(g.nodes)})" for g in homee.groups}
 
-    return vol.Schema(
-        {
-            vol.Required(
-                CONF_GROUPS,
-                default=default_options.get(CONF_GROUPS, groups),
-            ): cv.multi_select(groups_selection),
-            vol.Required(
-                CONF_WINDOW_GROUPS,
-                default=default_options.get(CONF_WINDOW_GROUPS, []),
-            ): cv.multi_select(groups_selection),
-            vol.Required(
-                CONF_DOOR_GROUPS,
-                default=default_options.get(CONF_DOOR_GROUPS, []),
-            ): cv.multi_select(groups_selection),
-            vol.Required(
-                CONF_ADD_HOME_DATA,
-                default=default_options.get(CONF_ADD_HOME_DATA, False),
-            ): bool,
-        }
-    )
+    schema = {
+        vol.Required(
+            CONF_GROUPS,
+            default=default_options.get(CONF_GROUPS, groups),
+        ): cv.multi_select(groups_selection),
+        vol.Required(
+            CONF_EXCLUDE_GROUPS,
+            default=default_options.get(CONF_EXCLUDE_GROUPS, []),
+        ): cv.multi_select(groups_selection),
+        vol.Optional(
+            CONF_INCLUDE_PROFILES,
+            default=default_options.get(CONF_INCLUDE_PROFILES, ""),
+        ): str,
+        vol.Optional(
+            CONF_EXCLUDE_PROFILES,
+            default=default_options.get(CONF_EXCLUDE_PROFILES, ""),
+        ): str,
+        vol.Optional(
+            CONF_EXCLUDE_ATTRIBUTE_TYPES,
+            default=default_options.get(CONF_EXCLUDE_ATTRIBUTE_TYPES, ""),
+        ): str,
+        vol.Required(
+            CONF_WINDOW_GROUPS,
+            default=default_options.get(CONF_WINDOW_GROUPS, []),
+        ): cv.multi_select(groups_selection),
+        vol.Required(
+            CONF_DOOR_GROUPS,
+            default=default_options.get(CONF_DOOR_GROUPS, []),
+        ): cv.multi_select(groups_selection),
+        vol.Required(
+            CONF_ADD_HOME_DATA,
+            default=default_options.get(CONF_ADD_HOME_DATA, False),
+        ): bool,
+        vol.Required(
+            CONF_RECORD_TRAFFIC,
+            default=default_options.get(CONF_RECORD_TRAFFIC, False),
+        ): bool,
+        vol.Required(
+            CONF_FIRE_EVENTS,
+            default=default_options.get(CONF_FIRE_EVENTS, False),
+        ): bool,
+        vol.Optional(
+            CONF_EVENT_NODES,
+            default=default_options.get(CONF_EVENT_NODES, ""),
+        ): str,
+        vol.Required(
+            CONF_EVENT_GROUPS,
+            default=default_options.get(CONF_EVENT_GROUPS, []),
+        ): cv.multi_select(groups_selection),
+        vol.Optional(
+            CONF_EVENT_ATTRIBUTE_TYPES,
+            default=default_options.get(CONF_EVENT_ATTRIBUTE_TYPES, ""),
+        ): str,
+        vol.Required(
+            CONF_AGGREGATE_GROUPS,
+            default=default_options.get(CONF_AGGREGATE_GROUPS, []),
+        ): cv.multi_select(groups_selection),
+        vol.Optional(
+            CONF_AGGREGATE_ATTRIBUTE_TYPES,
+            default=default_options.get(
+                CONF_AGGREGATE_ATTRIBUTE_TYPES, DEFAULT_AGGREGATE_ATTRIBUTE_TYPES
+            ),
+        ): str,
+    }
+
+    if advanced:
+        schema.update(get_advanced_options_schema(default_options))
+
+    return vol.Schema(schema)
+
+
+def get_advanced_options_schema(default_options={}):
+    """Get the schema for the websocket transport options."""
+    return {
+        vol.Required(
+            CONF_WS_COMPRESSION,
+            default=default_options.get(CONF_WS_COMPRESSION, DEFAULT_WS_COMPRESSION),
+        ): bool,
+        vol.Required(
+            CONF_WS_PING_INTERVAL,
+            default=default_options.get(
+                CONF_WS_PING_INTERVAL, DEFAULT_WS_PING_INTERVAL
+            ),
+        ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+        vol.Required(
+            CONF_WS_PING_TIMEOUT,
+            default=default_options.get(CONF_WS_PING_TIMEOUT, DEFAULT_WS_PING_TIMEOUT),
+        ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+        vol.Required(
+            CONF_WS_MAX_MESSAGE_SIZE,
+            default=default_options.get(
+                CONF_WS_MAX_MESSAGE_SIZE, DEFAULT_WS_MAX_MESSAGE_SIZE
+            ),
+        ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Required(
+            CONF_WS_MAX_QUEUE,
+            default=default_options.get(CONF_WS_MAX_QUEUE, DEFAULT_WS_MAX_QUEUE),
+        ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+        vol.Required(
+            CONF_IO_THREAD,
+            default=default_options.get(CONF_IO_THREAD, DEFAULT_IO_THREAD),
+        ): bool,
+        vol.Required(
+            CONF_COMPACT_MODEL,
+            default=default_options.get(CONF_COMPACT_MODEL, DEFAULT_COMPACT_MODEL),
+        ): bool,
+        vol.Required(
+            CONF_COMMAND_QUEUE_SIZE,
+            default=default_options.get(
+                CONF_COMMAND_QUEUE_SIZE, DEFAULT_COMMAND_QUEUE_SIZE
+            ),
+        ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+        vol.Required(
+            CONF_COMMAND_QUEUE_MAX_AGE,
+            default=default_options.get(
+                CONF_COMMAND_QUEUE_MAX_AGE, DEFAULT_COMMAND_QUEUE_MAX_AGE
+            ),
+        ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Required(
+            CONF_FANOUT,
+            default=default_options.get(CONF_FANOUT, DEFAULT_FANOUT),
+        ): bool,
+    }
 
 
 async def validate_and_connect(hass: core.HomeAssistant, data) -> Homee:
@@ -68,7 +204,13 @@ async def validate_and_connect(hass: core.HomeAssistant, data) -> Homee:
 
     # Create a Homee object and try to receive an access token.
     # This tells us if the host is reachable and if the credentials work
-    homee = Homee(data[CONF_HOST], data[CONF_USERNAME], data[CONF_PASSWORD])
+    # Use the same device name as the integration, so the token can be reused
+    homee = Homee(
+        data[CONF_HOST],
+        data[CONF_USERNAME],
+        data[CONF_PASSWORD],
+        "pymee_" + hass.config.location_name,
+    )
 
     try:
         await homee.get_access_token()
@@ -140,6 +282,10 @@ class ConfigFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         """Configure initial options."""
 
         if user_input is not None:
+            # Store the token from validation so setup does not need a new one
+            await async_save_token(
+                self.hass, self.homee.settings.uid, self.homee.token, self.homee.expires
+            )
             return self.async_create_entry(
                 title=f"{self.homee.settings.uid} ({self.homee.host})",
                 data={
@@ -151,7 +297,10 @@ class ConfigFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             )
 
         return self.async_show_form(
-            step_id="config", data_schema=get_options_schema(self.homee)
+            step_id="config",
+            data_schema=get_options_schema(
+                self.homee, advanced=self.show_advanced_options
+            ),
         )
 
 
@@ -163,12 +312,18 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         """Manage the options."""
 
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            # Keep the advanced options if they were not shown
+            return self.async_create_entry(
+                title="", data={**self.entry.options, **user_input}
+            )
 
         homee: Homee = self.hass.data[DOMAIN][self.entry.entry_id]
 
         return self.async_show_form(
-            step_id="init", data_schema=get_options_schema(homee, self.entry.options)
+            step_id="init",
+            data_schema=get_options_schema(
+                homee, self.entry.options, self.show_advanced_options
+            ),
         )
 
 
@@ -0,0 +1,899 @@
+"""The homee connection used by the integration."""
+import asyncio
+from collections import OrderedDict
+import contextlib
+import json
+import logging
+import time
+from urllib.parse import unquote
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_call_later
+from pymee import Homee
+from pymee.model import (
+    HomeeAttribute,
+    HomeeGroup,
+    HomeeNode,
+    HomeeRelationship,
+    HomeeSettings,
+)
+import websockets
+
+from .compact import compact_message, prune_nodes
+from .const import EVENT_ATTRIBUTE_CHANGED, UNAVAILABLE_NODE_STATES
+from .events import AttributeEventFilter
+from .fanout import FanoutHub
+from .helpers import SetupTimer
+from .io_thread import (
+    EVENT_ATTRIBUTES,
+    EVENT_CLOSED,
+    EVENT_MESSAGE,
+    EVENT_OPEN,
+    DeltaQueue,
+    HomeeIOThread,
+)
+from .token_store import async_save_token
+from .tracing import STAGE_QUEUED, STAGE_SEND, CommandTracer
+from .traffic import TrafficRecorder
+
+_LOGGER = logging.getLogger(__name__)
+
+DISCONNECT_TIMEOUT = 5
+HISTORY_TIMEOUT = 30
+
+# Refresh the access token after this fraction of its remaining lifetime
+TOKEN_REFRESH_FACTOR = 0.9
+
+# Messages of at least this size are decoded in the executor
+OFFLOAD_MESSAGE_SIZE = 64 * 1024
+
+# Backoff between commands that probe an unreachable node
+PROBE_BACKOFF_MIN = 10
+PROBE_BACKOFF_MAX = 600
+
+
+class HomeeConnection(Homee):
+    """Homee api object extended with the hooks used by the integration."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        """Initialize the connection. Takes the same arguments as Homee."""
+        super().__init__(*args, **kwargs)
+        self.hass: HomeAssistant = None
+        self.traffic_recorder: TrafficRecorder = None
+        self.attribute_event_filter: AttributeEventFilter = None
+        self._run_task: asyncio.Task = None
+        self._ws: websockets.WebSocketClientProtocol = None
+
+        # Entity state writes caused by attribute updates
+        self.state_writes = 0
+        self.suppressed_state_writes = 0
+
+        self.homeegrams: dict[int, HomeeHomeegram] = {}
+
+        # homee answers history requests with a history message, one at a time
+        self._history_lock = asyncio.Lock()
+        self._history_response: asyncio.Future = None
+
+        self.rejected_commands = 0
+        self._node_breakers: dict[int, NodeCircuitBreaker] = {}
+
+        # Commands set while disconnected, sent after the reconnect
+        self.command_queue: CommandQueue = None
+        self.tracer = CommandTracer()
+
+        # Durations of the last token fetch, websocket connect and full state download
+        self.connection_timings: dict[str, float] = {}
+        self._ws_open_started = 0
+        self._full_state_requested = 0
+        self.setup_timer: SetupTimer = None
+
+        # Keyword arguments for websockets.connect, e.g. compression or max_size
+        self.ws_options: dict = {}
+        self.bytes_received = 0
+        self.payload_bytes_received = 0
+
+        # Optional dedicated thread for the websocket, see io_thread
+        self.io_thread: HomeeIOThread = None
+        self._io_send_queue: asyncio.Queue = None
+        self._delta_queue: DeltaQueue = None
+
+        # Keep node and attribute payloads in compact form, see compact
+        self.compact_model = False
+        self._compact_options: dict[str, dict] = {}
+
+        # Local read-only consumers of the messages, see fanout
+        self.fanout: FanoutHub = None
+
+        # The homee uid the access token is stored for, see token_store
+        self.token_uid: str = None
+        self._cancel_token_refresh = None
+
+    @property
+    def nodes(self) -> list[HomeeNode]:
+        """The list of all nodes."""
+        return self._nodes
+
+    @nodes.setter
+    def nodes(self, nodes: list[HomeeNode]):
+        self._nodes = nodes
+        self._nodes_by_id: dict[int, HomeeNode] = {}
+        self._attributes_by_id: dict[int, HomeeAttribute] = {}
+        self._attribute_index_nodes = 0
+
+    @property
+    def coalesced_attribute_updates(self) -> int:
+        """Attribute updates replaced by a newer one before they were applied."""
+        return self._delta_queue.coalesced if self._delta_queue is not None else 0
+
+    def get_node_by_id(self, nodeId: int) -> HomeeNode:
+        """Returns the node with the given id or `None` if no node with the given id exists."""
+        node = self._nodes_by_id.get(nodeId)
+        if node is None and len(self._nodes_by_id) != len(self._nodes):
+            # pymee appends new nodes to the list, rebuild the index
+            self._nodes_by_id = {n.id: n for n in self._nodes}
+            node = self._nodes_by_id.get(nodeId)
+        return node
+
+    def get_attribute_by_id(self, attributeId: int) -> HomeeAttribute:
+        """Returns the attribute with the given id or `None` if it does not exist."""
+        attribute = self._attributes_by_id.get(attributeId)
+        if attribute is None and self._attribute_index_nodes != len(self._nodes):
+            # Attribute ids are unique across nodes, pymee only adds whole nodes
+            self._attributes_by_id = {
+                a.id: a for node in self._nodes for a in node.attributes
+            }
+            self._attribute_index_nodes = len(self._nodes)
+            attribute = self._attributes_by_id.get(attributeId)
+        return attribute
+
+    def get_values(self, items: list[dict]) -> list[dict]:
+        """Look up attributes by id or by node and type and return their values."""
+        results = []
+        for item in items:
+            attribute = None
+            if "attribute" in item:
+                attribute = self.get_attribute_by_id(item["attribute"])
+                node_id = item.get("node")
+                if attribute is not None and node_id not in (None, attribute.node_id):
+                    attribute = None
+            elif "node" in item and "type" in item:
+                node = self.get_node_by_id(item["node"])
+                if node is not None:
+                    attribute = node._attribute_map.get(item["type"])
+
+            if attribute is None:
+                results.append({**item, "error": "unknown attribute"})
+                continue
+
+            results.append(
+                {
+                    "node": attribute.node_id,
+                    "attribute": attribute.id,
+                    "type": attribute.type,
+                    "current_value": attribute.current_value,
+                    "target_value": attribute.target_value,
+                    "last_value": attribute.last_value,
+                    "last_changed": attribute.last_changed,
+                    "unit": attribute.unit,
+                }
+            )
+        return results
+
+    def start(self):
+        """Wraps run() with asyncio.create_task() and returns the resulting task."""
+        if self.io_thread is not None:
+            self.io_thread.start()
+        self._run_task = super().start()
+        return self._run_task
+
+    async def async_disconnect(self):
+        """Disconnect from homee and wait until the connection task has finished."""
+        self.disconnect()
+
+        if self._cancel_token_refresh is not None:
+            self._cancel_token_refresh()
+            self._cancel_token_refresh = None
+
+        if self.io_thread is not None:
+            if self._io_send_queue is not None:
+                # Close the websocket on the I/O thread right away
+                self.io_thread.call_soon(self._io_send_queue.put_nowait, None)
+            await self._async_wait_for_run_task()
+            await asyncio.get_running_loop().run_in_executor(None, self.io_thread.stop)
+            return
+
+        if self._ws is not None:
+            # Close the websocket right away instead of waiting for the next message
+            await self._ws.close()
+        await self._async_wait_for_run_task()
+
+    async def _async_wait_for_run_task(self):
+        if self._run_task is None or self._run_task.done():
+            return
+
+        # The receive loop only notices the disconnect with the next message,
+        # cancel the task if homee stays silent.
+        try:
+            await asyncio.wait_for(asyncio.shield(self._run_task), DISCONNECT_TIMEOUT)
+        except asyncio.TimeoutError:
+            _LOGGER.debug("Cancelling homee connection task after disconnect timeout")
+            self._run_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._run_task
+
+    async def get_access_token(self):
+        """Get an access token from the homee host and measure the request.
+
+        A still valid token is reused. New tokens are stored so they can be
+        reused after a restart.
+        """
+        previous_token = self.token
+        start = time.monotonic()
+        token = await super().get_access_token()
+        self.connection_timings["token"] = round(time.monotonic() - start, 3)
+
+        if token != previous_token and self.hass is not None:
+            if self.token_uid is not None:
+                await async_save_token(self.hass, self.token_uid, token, self.expires)
+            self.schedule_token_refresh()
+
+        return token
+
+    @callback
+    def schedule_token_refresh(self):
+        """Fetch a new token in the background before the current one expires."""
+        if self._cancel_token_refresh is not None:
+            self._cancel_token_refresh()
+
+        delay = max(self.expires - time.time(), 0) * TOKEN_REFRESH_FACTOR
+        self._cancel_token_refresh = async_call_later(
+            self.hass, delay, self._async_refresh_token
+        )
+
+    async def _async_refresh_token(self, *_):
+        self._cancel_token_refresh = None
+        expires = self.expires
+        self.expires = 0
+        try:
+            await self.get_access_token()
+        except Exception as e:  # pylint: disable=broad-except
+            _LOGGER.warning("Unable to refresh the homee access token: %s", e)
+            self.expires = expires
+
+    async def open_ws(self):
+        """Open the websocket connection. Runs until the connection is closed.
+
+        Same as Homee.open_ws but passes the configured transport options to
+        websockets, which also takes care of the keepalive pings. The websocket
+        runs on the I/O thread if one is set.
+        """
+        _LOGGER.info("Opening websocket...")
+        self._ws_open_started = time.monotonic()
+
+        if self.retries > 0:
+            await self.on_reconnect()
+
+        try:
+            if self.io_thread is not None:
+                await self._open_ws_threaded()
+            else:
+                await self._open_ws_in_loop()
+        except websockets.exceptions.InvalidStatusCode as e:
+            if e.status_code in (401, 403):
+                # The token was rejected, get a new one with the next attempt
+                self.token = ""
+                self.expires = 0
+            await self._ws_on_error(e)
+        except Exception as e:
+            await self._ws_on_error(e)
+
+        self.retries += 1
+        await self._ws_on_close()
+
+    async def _open_ws_in_loop(self):
+        """Run the websocket on the event loop of Home Assistant."""
+        async with websockets.connect(
+            uri=f"{self.ws_url}/connection?access_token={self.token}",
+            subprotocols=["v2"],
+            create_protocol=self._create_protocol,
+            **self.ws_options,
+        ) as ws:
+            self._ws = ws
+            receive_task: asyncio.Future = None
+            send_task: asyncio.Future = None
+            try:
+                await self._ws_on_open()
+
+                while (not self.shouldClose) and self.connected:
+                    try:
+                        # Only start the handlers that finished, cancelling a pending
+                        # receive would drop a message that is still being decoded.
+                        if receive_task is None or receive_task.done():
+                            receive_task = asyncio.ensure_future(
+                                self._ws_receive_handler(ws)
+                            )
+                        if send_task is None or send_task.done():
+                            send_task = asyncio.ensure_future(self._ws_send_handler(ws))
+                        done, _ = await asyncio.wait(
+                            [receive_task, send_task],
+                            return_when=asyncio.FIRST_COMPLETED,
+                        )
+
+                        for task in done:
+                            if task.exception() is not None:
+                                raise task.exception()
+
+                    except websockets.exceptions.ConnectionClosed:
+                        self.connected = False
+                        await self.on_disconnected()
+            finally:
+                for task in (receive_task, send_task):
+                    if task is not None:
+                        task.cancel()
+                self._ws = None
+
+    async def _open_ws_threaded(self):
+        """Run the websocket on the I/O thread and apply its messages.
+
+        The I/O thread receives and decodes the messages. Only the resulting
+        events and coalesced attribute updates are handled on the event loop.
+        """
+        queue = DeltaQueue(asyncio.get_running_loop())
+        self._delta_queue = queue
+        self._io_send_queue = asyncio.Queue()
+        connection = self.io_thread.run_coroutine(self._io_connection(queue))
+
+        try:
+            while True:
+                for event, data in await queue.get():
+                    if event == EVENT_ATTRIBUTES:
+                        for attribute in data.values():
+                            await self._handle_message({"attribute": attribute})
+                    elif event == EVENT_MESSAGE:
+                        if data[1] is None:
+                            await self._handle_message(data[0])
+                        else:
+                            await self._handle_parsed_message(*data)
+                    elif event == EVENT_OPEN:
+                        await self._ws_on_open()
+                    elif event == EVENT_CLOSED:
+                        if data is not None:
+                            raise data
+                        return
+        finally:
+            # Close the websocket if the task was cancelled
+            self.io_thread.call_soon(self._io_send_queue.put_nowait, None)
+            await asyncio.wait([connection])
+
+    async def _io_connection(self, queue: DeltaQueue):
+        """Receive, record and decode the messages. Runs on the I/O thread."""
+        error = None
+        try:
+            async with websockets.connect(
+                uri=f"{self.ws_url}/connection?access_token={self.token}",
+                subprotocols=["v2"],
+                create_protocol=self._create_protocol,
+                **self.ws_options,
+            ) as ws:
+                queue.put(EVENT_OPEN)
+                send_task = asyncio.create_task(self._io_send_handler(ws))
+                try:
+                    async for msg in ws:
+                        self._io_on_message(queue, msg)
+                finally:
+                    send_task.cancel()
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        except Exception as e:  # pylint: disable=broad-except
+            error = e
+        queue.put(EVENT_CLOSED, error)
+
+    def _io_on_message(self, queue: DeltaQueue, msg: str):
+        self.payload_bytes_received += len(msg)
+        if self.traffic_recorder is not None:
+            self.hass.loop.call_soon_threadsafe(
+                self.traffic_recorder.record_inbound, msg
+            )
+
+        data, full_state = parse_message(
+            msg, not self.nodes and not self.groups, self._get_compact_options()
+        )
+        if full_state is None and list(data) == ["attribute"]:
+            queue.put_attribute(data["attribute"])
+        else:
+            queue.put(EVENT_MESSAGE, (data, full_state))
+
+    async def _io_send_handler(self, ws: websockets.WebSocketClientProtocol):
+        while (msg := await self._io_send_queue.get()) is not None:
+            await ws.send(msg)
+        await ws.close()
+
+    def _create_protocol(self, *args, **kwargs):
+        """Create a websocket protocol that counts the received bytes."""
+        return CountingClientProtocol(self, *args, **kwargs)
+
+    async def _ws_on_open(self):
+        """Websocket on_open callback."""
+        self._full_state_requested = time.monotonic()
+        self.connection_timings["websocket"] = round(
+            self._full_state_requested - self._ws_open_started, 3
+        )
+        await super()._ws_on_open()
+
+        if self.command_queue is not None:
+            await self._flush_command_queue()
+
+    async def _ws_on_message(self, msg: str):
+        """Websocket on_message callback."""
+        self.payload_bytes_received += len(msg)
+        if self.traffic_recorder is not None:
+            self.traffic_recorder.record_inbound(msg)
+
+        await self.handle_raw_message(msg)
+
+    async def handle_raw_message(self, msg: str):
+        """Decode and handle a message without recording it, e.g. to replay traffic."""
+        if len(msg) < OFFLOAD_MESSAGE_SIZE:
+            await self._handle_message(json.loads(msg))
+            return
+
+        # Large messages like the full state would block the event loop for
+        # a noticeable time, decode them and build the initial model in the executor.
+        build_model = not self.nodes and not self.groups
+        data, full_state = await asyncio.get_running_loop().run_in_executor(
+            None, parse_message, msg, build_model, self._get_compact_options()
+        )
+
+        await self._handle_parsed_message(data, full_state)
+
+    async def _handle_parsed_message(self, data: dict, full_state: tuple):
+        """Handle a large message decoded by parse_message outside of the event loop."""
+        if full_state is None:
+            start = time.monotonic()
+            await self._handle_message(data)
+            self.connection_timings["large_message_loop"] = round(
+                time.monotonic() - start, 3
+            )
+            return
+
+        start = time.monotonic()
+        self.settings, self.nodes, self.groups, self.relationships = full_state
+        self._connected_event.set()
+        await self.on_message(data)
+        self.connection_timings["full_state_loop"] = round(time.monotonic() - start, 3)
+
+    async def send(self, msg: str) -> bool:
+        """Send a raw string message to homee.
+
+        Returns False if the message was dropped because homee is not connected.
+        """
+        if not self.connected or self.shouldClose:
+            return False
+
+        if self.traffic_recorder is not None:
+            self.traffic_recorder.record_outbound(msg)
+
+        if self.io_thread is None:
+            await super().send(msg)
+        else:
+            self.io_thread.call_soon(self._io_send_queue.put_nowait, msg)
+        return True
+
+    def _update_or_create_relationship(self, data: dict):
+        # Homee._update_or_create_relationship calls next() on a list and fails
+        # for every relationship update, e.g. with the full state after a reconnect.
+        relationship = next((r for r in self.relationships if r.id == data["id"]), None)
+
+        if relationship is not None:
+            relationship._data = data
+        else:
+            self.relationships.append(HomeeRelationship(data))
+        self._remap_relationships()
+
+    def _update_or_create_relationships(self, data: list[dict]):
+        if len(self.relationships) <= 0:
+            self.relationships = [HomeeRelationship(r) for r in data]
+            return
+
+        # Update all relationships first and remap the nodes and groups only once
+        relationships_by_id = {r.id: r for r in self.relationships}
+        for relationship_data in data:
+            relationship = relationships_by_id.get(relationship_data["id"])
+            if relationship is not None:
+                relationship._data = relationship_data
+            else:
+                self.relationships.append(HomeeRelationship(relationship_data))
+        self._remap_relationships()
+
+    def _remap_relationships(self):
+        remap_relationships(self.nodes, self.groups, self.relationships)
+
+    def _update_homeegrams(self, homeegrams: list[dict]):
+        """Update or create the homeegrams, which pymee does not track."""
+        for data in homeegrams:
+            homeegram = self.homeegrams.get(data["id"])
+            if homeegram is not None:
+                homeegram._data = data
+            else:
+                self.homeegrams[data["id"]] = HomeeHomeegram(data)
+
+    async def get_attribute_history(
+        self, nodeId: int, attributeId: int, start: int, end: int, limit: int
+    ) -> dict:
+        """Request the stored history of an attribute between two unix timestamps."""
+        async with self._history_lock:
+            self._history_response = asyncio.get_running_loop().create_future()
+            try:
+                if not await self.send(
+                    f"GET:nodes/{nodeId}/attributes/{attributeId}/history"
+                    f"?from={start}&till={end}&limit={limit}"
+                ):
+                    raise HomeeNotConnectedException()
+                return await asyncio.wait_for(self._history_response, HISTORY_TIMEOUT)
+            except asyncio.TimeoutError as e:
+                raise HomeAssistantError(
+                    f"homee did not send the history of attribute {attributeId}"
+                    f" within {HISTORY_TIMEOUT} seconds"
+                ) from e
+            finally:
+                self._history_response = None
+
+    async def set_value(self, deviceId: int, attributeId: int, value: float):
+        """Set the target value of an attribute of a device.
+
+        While disconnected the command is queued if the command queue is enabled.
+        """
+        if self._queue_command(deviceId, attributeId, value):
+            self.tracer.mark(attributeId, STAGE_QUEUED)
+            return
+
+        node = self.get_node_by_id(deviceId)
+        if node is not None and not self._allow_command(node):
+            self.rejected_commands += 1
+            raise NodeUnavailableException(deviceId)
+
+        # Same as Homee.set_value, which does not tell if the command was sent
+        if await self.send(
+            f"PUT:/nodes/{deviceId}/attributes/{attributeId}?target_value={value}"
+        ):
+            self.tracer.mark(attributeId, STAGE_SEND)
+        else:
+            _LOGGER.warning(
+                "Dropped value %s for attribute %s of node %s, homee is not connected",
+                value,
+                attributeId,
+                deviceId,
+            )
+            self.tracer.drop(attributeId)
+
+    async def set_values(self, items: list[tuple[int, int, float]]) -> list[dict]:
+        """Set the target values of many attributes and return a result per item.
+
+        Items are checked against the model and the circuit breakers first, the
+        remaining commands are queued back to back without an error aborting the batch.
+        """
+        results = []
+        for node_id, attribute_id, value in items:
+            result = {"node": node_id, "attribute": attribute_id, "value": value}
+            node = self.get_node_by_id(node_id)
+            attribute = self.get_attribute_by_id(attribute_id)
+            if node is None or attribute is None or attribute.node_id != node_id:
+                result["error"] = "unknown attribute"
+            elif self._queue_command(node_id, attribute_id, value):
+                result["queued"] = True
+            elif not self.connected:
+                result["error"] = "not connected"
+            elif not self._allow_command(node):
+                self.rejected_commands += 1
+                result["error"] = "node unavailable"
+            else:
+                await self.send(
+                    f"PUT:/nodes/{node_id}/attributes/{attribute_id}"
+                    f"?target_value={value}"
+                )
+            result["success"] = "error" not in result
+            results.append(result)
+
+        _LOGGER.info(
+            "Set %s of %s values",
+            sum(r["success"] for r in results),
+            len(results),
+        )
+        return results
+
+    def _queue_command(self, node_id: int, attribute_id: int, value: float) -> bool:
+        """Queue the command if homee is disconnected. Returns True if queued."""
+        if self.command_queue is None or self.connected or self.shouldClose:
+            return False
+
+        _LOGGER.debug(
+            "Queueing value %s for attribute %s of node %s until homee reconnects",
+            value,
+            attribute_id,
+            node_id,
+        )
+        self.command_queue.put(node_id, attribute_id, value, time.monotonic())
+        return True
+
+    async def _flush_command_queue(self):
+        """Send the commands queued while disconnected in the order they were set."""
+        dropped = self.command_queue.dropped
+        commands = self.command_queue.pop_all(time.monotonic())
+        for node_id, attribute_id, value in commands:
+            if await self.send(
+                f"PUT:/nodes/{node_id}/attributes/{attribute_id}?target_value={value}"
+            ):
+                self.tracer.mark(attribute_id, STAGE_SEND)
+            else:
+                self.tracer.drop(attribute_id)
+
+        if commands or self.command_queue.dropped != dropped:
+            _LOGGER.info(
+                "Sent %s commands queued while disconnected, dropped %s",
+                len(commands),
+                self.command_queue.dropped - dropped,
+            )
+
+    def _allow_command(self, node: HomeeNode) -> bool:
+        """Check the circuit breaker of the node before sending a command."""
+        if node.state not in UNAVAILABLE_NODE_STATES:
+            self._node_breakers.pop(node.id, None)
+            return True
+
+        breaker = self._node_breakers.setdefault(node.id, NodeCircuitBreaker())
+        return breaker.allow_probe(time.monotonic())
+
+    async def _handle_message(self, msg: dict):
+        """Compact the node and attribute payloads before pymee stores them."""
+        if self.compact_model:
+            compact_message(msg, self._compact_options)
+        await super()._handle_message(msg)
+
+    def _get_compact_options(self) -> dict[str, dict]:
+        """The options shared by the compact attributes, None if not compacted."""
+        return self._compact_options if self.compact_model else None
+
+    async def _handle_attribute_change(self, attribute_data: dict):
+        """Update the attribute and fire an event if it matches the event filter."""
+        event_filter = self.attribute_event_filter
+        if event_filter is None or not event_filter.matches(
+            attribute_data["node_id"], attribute_data["type"]
+        ):
+            await self._apply_attribute_change(attribute_data)
+            return
+
+        node = self.get_node_by_id(attribute_data["node_id"])
+        attribute = node.get_attribute_by_id(attribute_data["id"]) if node else None
+        old_value = attribute.current_value if attribute is not None else None
+
+        await self._apply_attribute_change(attribute_data)
+
+        if attribute is not None and old_value != attribute_data["current_value"]:
+            self.hass.bus.async_fire(
+                EVENT_ATTRIBUTE_CHANGED,
+                {
+                    "node_id": attribute_data["node_id"],
+                    "attribute_id": attribute_data["id"],
+                    "type": attribute_data["type"],
+                    "old_value": old_value,
+                    "new_value": attribute_data["current_value"],
+                },
+            )
+
+    async def _apply_attribute_change(self, attribute_data: dict):
+        """Update the attribute while the trace of a confirmed command is set."""
+        self.tracer.writing = self.tracer.attribute_updated(attribute_data)
+        try:
+            await super()._handle_attribute_change(attribute_data)
+        finally:
+            self.tracer.writing = None
+
+    async def on_message(self, msg: dict):
+        """Called when the websocket receives a message."""
+        if self.fanout is not None:
+            self.fanout.publish(msg)
+
+        if self.attribute_event_filter is not None and (
+            "all" in msg or "relationships" in msg or "relationship" in msg
+        ):
+            self.attribute_event_filter.compile(self)
+
+        if self.compact_model and ("all" in msg or "nodes" in msg or "node" in msg):
+            prune_nodes(self.nodes)
+
+        if "history" in msg:
+            if self._history_response is not None and not self._history_response.done():
+                self._history_response.set_result(msg["history"])
+
+        if "all" in msg:
+            self._update_homeegrams(msg["all"].get("homeegrams", []))
+        elif "homeegrams" in msg:
+            self._update_homeegrams(msg["homeegrams"])
+        elif "homeegram" in msg:
+            self._update_homeegrams([msg["homeegram"]])
+
+        if "all" in msg:
+            self.connection_timings["full_state"] = round(
+                time.monotonic() - self._full_state_requested, 3
+            )
+            _LOGGER.debug(
+                "Received full state from homee, %s state writes so far, %s suppressed",
+                self.state_writes,
+                self.suppressed_state_writes,
+            )
+
+
+def remap_relationships(
+    nodes: list[HomeeNode],
+    groups: list[HomeeGroup],
+    relationships: list[HomeeRelationship],
+):
+    """Same as Homee._remap_relationships, but with lookups by id."""
+    for node in nodes:
+        node.groups.clear()
+    for group in groups:
+        group.nodes.clear()
+
+    nodes_by_id = {n.id: n for n in nodes}
+    groups_by_id = {g.id: g for g in groups}
+    for relationship in relationships:
+        node = nodes_by_id.get(relationship.node_id)
+        group = groups_by_id.get(relationship.group_id)
+        if node is not None and group is not None:
+            node.groups.append(group)
+            group.nodes.append(node)
+
+
+def parse_message(msg: str, build_model: bool, compact_options: dict = None):
+    """Decode a message and build the nodes, groups and relationships of a full state.
+
+    Runs in the executor. The model is only built if requested and the message
+    contains the full state. The payloads are compacted if the shared options
+    of the compact model are given.
+    """
+    data = json.loads(msg)
+    if compact_options is not None:
+        compact_message(data, compact_options)
+    if not build_model or "all" not in data:
+        return data, None
+
+    full_state = data["all"]
+    nodes = [HomeeNode(n) for n in full_state["nodes"]]
+    groups = [HomeeGroup(g) for g in full_state["groups"]]
+    relationships = [HomeeRelationship(r) for r in full_state["relationships"]]
+
+    remap_relationships(nodes, groups, relationships)
+
+    settings = HomeeSettings(full_state["settings"])
+    return data, (settings, nodes, groups, relationships)
+
+
+class HomeeHomeegram:
+    """A homeegram, an automation that runs on the homee cube."""
+
+    def __init__(self, data: dict) -> None:
+        """Initialize the homeegram from the data sent by homee."""
+        self._data = data
+
+    @property
+    def id(self) -> int:
+        """The unique id of the homeegram."""
+        return self._data["id"]
+
+    @property
+    def name(self) -> str:
+        """The decoded name of the homeegram."""
+        return unquote(self._data["name"])
+
+    @property
+    def active(self) -> bool:
+        """Wether the homeegram is enabled."""
+        return bool(self._data.get("active", True))
+
+
+class CountingClientProtocol(websockets.WebSocketClientProtocol):
+    """Websocket client protocol that counts the bytes received on the wire."""
+
+    def __init__(self, homee: HomeeConnection, *args, **kwargs) -> None:
+        """Initialize the protocol."""
+        super().__init__(*args, **kwargs)
+        self._homee = homee
+
+    def data_received(self, data: bytes) -> None:
+        """Count the compressed bytes before websockets decodes them."""
+        self._homee.bytes_received += len(data)
+        super().data_received(data)
+
+
+class NodeCircuitBreaker:
+    """Let commands to an unreachable node through only as probes with backoff."""
+
+    def __init__(self) -> None:
+        """Initialize the breaker. The first command is always allowed."""
+        self.probes = 0
+        self.next_probe = 0
+
+    def allow_probe(self, now: float) -> bool:
+        """Return True if a probe command may be sent at the given time."""
+        if now < self.next_probe:
+            return False
+
+        backoff = min(PROBE_BACKOFF_MIN * 2**self.probes, PROBE_BACKOFF_MAX)
+        self.probes += 1
+        self.next_probe = now + backoff
+        return True
+
+
+class CommandQueue:
+    """Bounded queue of the commands set while homee is disconnected.
+
+    Only the latest value per attribute is kept. Commands are kept in the order
+    of their latest value and are dropped once they are older than max_age or
+    if the queue is full.
+    """
+
+    def __init__(self, max_size: int, max_age: float) -> None:
+        """Initialize an empty queue."""
+        self.max_size = max_size
+        self.max_age = max_age
+        self.replaced = 0
+        self.dropped = 0
+        self._commands: OrderedDict[tuple[int, int], tuple[float, float]] = (
+            OrderedDict()
+        )
+
+    @property
+    def depth(self) -> int:
+        """The number of queued commands."""
+        return len(self._commands)
+
+    @property
+    def metrics(self) -> dict:
+        """The depth of the queue and the number of replaced and dropped commands."""
+        return {"depth": self.depth, "replaced": self.replaced, "dropped": self.dropped}
+
+    def put(self, node_id: int, attribute_id: int, value: float, now: float):
+        """Queue a command, replacing a queued command for the same attribute."""
+        key = (node_id, attribute_id)
+        if self._commands.pop(key, None) is not None:
+            self.replaced += 1
+
+        self._drop_expired(now)
+        if len(self._commands) >= self.max_size:
+            self._commands.popitem(last=False)
+            self.dropped += 1
+        self._commands[key] = (value, now)
+
+    def pop_all(self, now: float) -> list[tuple[int, int, float]]:
+        """Remove and return the commands that are not expired, oldest first."""
+        self._drop_expired(now)
+        commands = [(n, a, value) for (n, a), (value, _) in self._commands.items()]
+        self._commands.clear()
+        return commands
+
+    def _drop_expired(self, now: float):
+        # Commands are ordered by the time they were queued
+        while self._commands:
+            key, (_, queued) = next(iter(self._commands.items()))
+            if now - queued <= self.max_age:
+                break
+            del self._commands[key]
+            self.dropped += 1
+
+
+class NodeUnavailableException(HomeAssistantError):
+    """Raised if a command is sent to a node that homee can not reach."""
+
+    def __init__(self, nodeId) -> None:
+        """Initialize the exception."""
+        super().__init__(f"homee node {nodeId} is unavailable")
+        self.nodeId = nodeId
+
+
+class HomeeNotConnectedException(HomeAssistantError):
+    """Raised if a request that needs a response is made while disconnected."""
+
+    def __init__(self) -> None:
+        """Initialize the exception."""
+        super().__init__("homee is not connected")
@@ -1,15 +1,43 @@
 """Constants for the homee integration."""
+from pymee.const import NodeState
 
 # General
 DOMAIN = "homee"
 
+# Events
+EVENT_ATTRIBUTE_CHANGED = "homee_attribute_changed"
+
 # Services
 SERVICE_SET_VALUE = "set_value"
+SERVICE_SET_VALUES = "set_values"
+SERVICE_GET_VALUES = "get_values"
+SERVICE_PLAY_HOMEEGRAM = "play_homeegram"
+SERVICE_IMPORT_HISTORY = "import_history"
+SERVICE_REPLAY_TRAFFIC = "replay_traffic"
+SERVICE_PROFILE = "profile"
 
 # Attributes
 ATTR_NODE = "node"
 ATTR_ATTRIBUTE = "attribute"
 ATTR_VALUE = "value"
+ATTR_VALUES = "values"
+ATTR_ATTRIBUTES = "attributes"
+ATTR_TYPE = "type"
+ATTR_HOMEEGRAM = "homeegram"
+ATTR_FILE = "file"
+ATTR_SPEED = "speed"
+ATTR_SECONDS = "seconds"
+ATTR_TOP = "top"
+ATTR_DAYS = "days"
+ATTR_PAGE_SIZE = "page_size"
+ATTR_RESTART = "restart"
+
+# Node states in which the node can not be reached by homee
+UNAVAILABLE_NODE_STATES = [
+    NodeState.UNAVAILABLE,
+    NodeState.HOST_UNAVAILABLE,
+    NodeState.REMOTE_NODE_DELETED,
+]
 
 HOMEE_LIGHT_MIN_MIRED = 153
 HOMEE_LIGHT_MAX_MIRED = 556
@@ -20,3 +48,42 @@ CONF_ADD_HOME_DATA = "add_homee_data"
 CONF_GROUPS = "groups"
 CONF_WINDOW_GROUPS = "window_groups"
 CONF_DOOR_GROUPS = "door_groups"
+CONF_RECORD_TRAFFIC = "record_traffic"
+CONF_FIRE_EVENTS = "fire_events"
+CONF_EVENT_NODES = "event_nodes"
+CONF_EVENT_GROUPS = "event_groups"
+CONF_EVENT_ATTRIBUTE_TYPES = "event_attribute_types"
+CONF_EXCLUDE_GROUPS = "exclude_groups"
+CONF_INCLUDE_PROFILES = "include_profiles"
+CONF_EXCLUDE_PROFILES = "exclude_profiles"
+CONF_EXCLUDE_ATTRIBUTE_TYPES = "exclude_attribute_types"
+CONF_AGGREGATE_GROUPS = "aggregate_groups"
+CONF_AGGREGATE_ATTRIBUTE_TYPES = "aggregate_attribute_types"
+
+DEFAULT_AGGREGATE_ATTRIBUTE_TYPES = "CURRENT_ENERGY_USE, OPEN_CLOSE"
+
+# Advanced options
+CONF_WS_COMPRESSION = "ws_compression"
+CONF_WS_PING_INTERVAL = "ws_ping_interval"
+CONF_WS_PING_TIMEOUT = "ws_ping_timeout"
+CONF_WS_MAX_MESSAGE_SIZE = "ws_max_message_size"
+CONF_WS_MAX_QUEUE = "ws_max_queue"
+CONF_IO_THREAD = "io_thread"
+CONF_COMPACT_MODEL = "compact_model"
+CONF_COMMAND_QUEUE_SIZE = "command_queue_size"
+CONF_COMMAND_QUEUE_MAX_AGE = "command_queue_max_age"
+CONF_FANOUT = "fanout"
+
+DEFAULT_WS_COMPRESSION = True
+DEFAULT_WS_PING_INTERVAL = 20
+DEFAULT_WS_PING_TIMEOUT = 20
+DEFAULT_WS_MAX_MESSAGE_SIZE = 1
+DEFAULT_WS_MAX_QUEUE = 32
+DEFAULT_IO_THREAD = False
+DEFAULT_COMPACT_MODEL = False
+DEFAULT_COMMAND_QUEUE_SIZE = 50
+DEFAULT_COMMAND_QUEUE_MAX_AGE = 30
+DEFAULT_FANOUT = False
+
+# Traffic recording
+TRAFFIC_RECORDING_FILE = "homee_traffic_{}.rec.gz"
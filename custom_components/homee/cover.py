@@ -55,14 +55,30 @@ def get_device_class(node: HomeeNode) -> int:
     return None
 
 
+def get_open_close_attribute(node: HomeeNode) -> int:
+    """Determine the attribute type that opens and closes a homee cover."""
+    # TODO needs to be changed, when covers with tilt should be supported
+    # For now there should only be one of these.
+    if AttributeType.OPEN_CLOSE in node._attribute_map:
+        return AttributeType.OPEN_CLOSE
+    if AttributeType.SLAT_ROTATION_IMPULSE in node._attribute_map:
+        return AttributeType.SLAT_ROTATION_IMPULSE
+    # UP_DOWN is default
+    return AttributeType.UP_DOWN
+
+
+@helpers.timed_platform_setup
 async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_devices):
     """Add the homee platform for the cover integration."""
     # homee: Homee = hass.data[DOMAIN][config_entry.entry_id]
 
     devices = []
+    rules = helpers.ImportRules(config_entry.options)
     for node in helpers.get_imported_nodes(hass, config_entry):
         if not is_cover_node(node):
             continue
+        if not rules.includes_attribute_type(get_open_close_attribute(node)):
+            continue
         devices.append(HomeeCover(node, config_entry))
     if devices:
         async_add_devices(devices)
@@ -96,14 +112,7 @@ class HomeeCover(HomeeNodeEntity, CoverEntity):
 
         self._unique_id = f"{self._node.id}-cover"
 
-        # TODO needs to be changed, when covers with tilt should be supported
-        # For now there should only be one of these.
-        if self.has_attribute(AttributeType.OPEN_CLOSE):
-            self._open_close_attribute = AttributeType.OPEN_CLOSE
-        elif self.has_attribute(AttributeType.SLAT_ROTATION_IMPULSE):
-            self._open_close_attribute = AttributeType.SLAT_ROTATION_IMPULSE
-        else:  # UP_DOWN is default
-            self._open_close_attribute = AttributeType.UP_DOWN
+        self._open_close_attribute = get_open_close_attribute(node)
 
         # Set position can also be controlled with different attributes.
         if self.has_attribute(AttributeType.SHUTTER_SLAT_POSITION):
@@ -121,7 +130,7 @@ class HomeeCover(HomeeNodeEntity, CoverEntity):
         """Return the supported features of the entity."""
         return self._supported_features
 
-    @property
+    @helpers.derived_state_property
     def current_cover_position(self):
         """Return the cover's position."""
         # Translate the homee position values to HA's 0-100 scale
@@ -142,7 +151,7 @@ class HomeeCover(HomeeNodeEntity, CoverEntity):
         """Return the closing status of the cover."""
         return self.attribute(self._open_close_attribute) == 4
 
-    @property
+    @helpers.derived_state_property
     def is_closed(self):
         """Return the state of the cover."""
         # TODO: Not sure if the open_close reverse option really has effect
@@ -0,0 +1,42 @@
+"""Diagnostics support for the homee integration."""
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .connection import HomeeConnection
+from .const import DOMAIN
+from .helpers import get_homee_data
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict:
+    """Return diagnostics for a homee config entry."""
+    homee: HomeeConnection = hass.data[DOMAIN][entry.entry_id]
+    queue = homee.command_queue
+
+    return {
+        "setup": {
+            "total": homee.setup_timer.total,
+            "phases": homee.setup_timer.phases,
+            "entities": homee.setup_timer.entities,
+        },
+        "connection": {
+            "connected": homee.connected,
+            "timings": homee.connection_timings,
+            "options": homee.ws_options,
+            "bytes_received": homee.bytes_received,
+            "payload_bytes_received": homee.payload_bytes_received,
+            "io_thread": homee.io_thread is not None,
+            "coalesced_attribute_updates": homee.coalesced_attribute_updates,
+            "compact_model": homee.compact_model,
+        },
+        "metrics": {
+            "state_writes": homee.state_writes,
+            "suppressed_state_writes": homee.suppressed_state_writes,
+            "rejected_commands": homee.rejected_commands,
+            "command_queue": queue.metrics if queue is not None else None,
+            "fanout": homee.fanout.metrics if homee.fanout is not None else None,
+        },
+        "nodes": [get_homee_data(node) for node in homee.nodes],
+        "command_traces": [trace.as_dict() for trace in homee.tracer.traces],
+    }
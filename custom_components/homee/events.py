@@ -0,0 +1,42 @@
+"""Filter for the homee_attribute_changed events."""
+from pymee import Homee
+
+from .const import CONF_EVENT_ATTRIBUTE_TYPES, CONF_EVENT_GROUPS, CONF_EVENT_NODES
+from .helpers import ATTRIBUTE_TYPE_NAMES, parse_id_list
+
+
+class AttributeEventFilter:
+    """Decide which attribute changes fire events.
+
+    The configured nodes, groups and attribute types are resolved to sets once,
+    so checking an attribute change costs two set lookups.
+    """
+
+    def __init__(self, options: dict) -> None:
+        """Initialize the filter from the entry options."""
+        self._node_ids = parse_id_list(options.get(CONF_EVENT_NODES, ""))
+        self._group_ids = [int(g) for g in options.get(CONF_EVENT_GROUPS, [])]
+
+        types = parse_id_list(
+            options.get(CONF_EVENT_ATTRIBUTE_TYPES, ""), ATTRIBUTE_TYPE_NAMES
+        )
+        self.attribute_types: frozenset[int] = frozenset(types) if types else None
+        self.nodes: frozenset[int] = None
+
+    def compile(self, homee: Homee):
+        """Resolve the configured nodes and groups to a set of node ids."""
+        if not self._node_ids and not self._group_ids:
+            self.nodes = None
+            return
+
+        nodes = set(self._node_ids)
+        for group in homee.groups:
+            if group.id in self._group_ids:
+                nodes.update(n.id for n in group.nodes)
+        self.nodes = frozenset(nodes)
+
+    def matches(self, node_id: int, attribute_type: int) -> bool:
+        """Return True if a change of the attribute should fire an event."""
+        return (self.nodes is None or node_id in self.nodes) and (
+            self.attribute_types is None or attribute_type in self.attribute_types
+        )
@@ -0,0 +1,226 @@
+"""Re-broadcast the messages of a homee connection to local read-only consumers."""
+import asyncio
+from http import HTTPStatus
+import json
+import logging
+
+from aiohttp import WSMsgType, web
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import Unauthorized
+from pymee.model import HomeeNode
+
+from .compact import CompactData, get_raw_data
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+FANOUT_URL = "/api/homee/{uid}/stream"
+DATA_FANOUT_VIEW = f"{DOMAIN}_fanout_view"
+
+# Consumers that fall this many messages behind are disconnected
+SUBSCRIBER_QUEUE_SIZE = 256
+HEARTBEAT_INTERVAL = 30
+
+# Settings that are not sent to the consumers
+REDACTED_SETTINGS = {
+    "webhooks_key",
+    "wlan_ssid",
+    "available_ssids",
+    "lan_ip_address",
+    "latitude",
+    "longitude",
+}
+
+# Messages that change the model, other messages answer our own requests
+FANOUT_MESSAGES = frozenset(
+    {
+        "all",
+        "settings",
+        "attribute",
+        "node",
+        "nodes",
+        "group",
+        "groups",
+        "relationship",
+        "relationships",
+    }
+)
+
+
+def _encode(value):
+    if isinstance(value, CompactData):
+        return value.full()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _dumps(msg: dict) -> str:
+    return json.dumps(msg, default=_encode)
+
+
+def _close_queue(queue: asyncio.Queue):
+    # Make room for the None that tells the consumer to disconnect
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(None)
+
+
+class FanoutHub:
+    """Distribute the messages of one homee to the connected consumers.
+
+    Messages are encoded once for all consumers. A consumer that can not keep
+    up is disconnected instead of buffering an unbounded number of messages.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the hub without consumers."""
+        self._subscribers: set[asyncio.Queue] = set()
+        self.dropped_subscribers = 0
+
+    @property
+    def subscribers(self) -> int:
+        """The number of connected consumers."""
+        return len(self._subscribers)
+
+    @property
+    def metrics(self) -> dict:
+        """The number of connected and of disconnected slow consumers."""
+        return {
+            "subscribers": self.subscribers,
+            "dropped_subscribers": self.dropped_subscribers,
+        }
+
+    @callback
+    def subscribe(self) -> asyncio.Queue:
+        """Add a consumer. A None in its queue means it has to disconnect."""
+        queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        return queue
+
+    @callback
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Remove a consumer."""
+        self._subscribers.discard(queue)
+
+    @callback
+    def publish(self, msg: dict):
+        """Send a homee message to all consumers."""
+        if not self._subscribers or next(iter(msg), None) not in FANOUT_MESSAGES:
+            return
+
+        data = _dumps(_redact_message(msg))
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(data)
+            except asyncio.QueueFull:
+                self.unsubscribe(queue)
+                self.dropped_subscribers += 1
+                _close_queue(queue)
+
+    @callback
+    def close(self):
+        """Disconnect all consumers."""
+        for queue in list(self._subscribers):
+            self.unsubscribe(queue)
+            _close_queue(queue)
+
+
+def get_full_state(homee) -> dict:
+    """Build a full state message from the current model without the secrets."""
+    return {
+        "all": {
+            "settings": _redact_settings(homee.settings._data),
+            "nodes": [_get_node_data(node) for node in homee.nodes],
+            "groups": [group._data for group in homee.groups],
+            "relationships": [r._data for r in homee.relationships],
+        }
+    }
+
+
+def _redact_settings(settings: dict) -> dict:
+    return async_redact_data(settings, REDACTED_SETTINGS)
+
+
+def _redact_message(msg: dict) -> dict:
+    # Copy the messages with settings, the connection keeps using the original
+    if "all" in msg:
+        return {
+            "all": {**msg["all"], "settings": _redact_settings(msg["all"]["settings"])}
+        }
+    if "settings" in msg:
+        return {**msg, "settings": _redact_settings(msg["settings"])}
+    return msg
+
+
+def _get_node_data(node: HomeeNode) -> dict:
+    if isinstance(node._data, CompactData):
+        return get_raw_data(node)
+    # pymee does not update the attributes in the node payload
+    return {**node._data, "attributes": [a._data for a in node.attributes]}
+
+
+@callback
+def async_register_view(hass: HomeAssistant):
+    """Register the stream endpoint once for all homees."""
+    if not hass.data.get(DATA_FANOUT_VIEW):
+        hass.http.register_view(HomeeFanoutView())
+        hass.data[DATA_FANOUT_VIEW] = True
+
+
+class HomeeFanoutView(HomeAssistantView):
+    """Read-only websocket with the messages of a homee.
+
+    The stream starts with a full state message built from the current model,
+    followed by the messages homee sends to the integration. The secret settings
+    are removed from all messages. Consumers
+    authenticate with the access token of an admin user.
+    """
+
+    url = FANOUT_URL
+    name = "api:homee:stream"
+
+    async def get(self, request: web.Request, uid: str) -> web.StreamResponse:
+        """Stream the messages of the homee with the given uid."""
+        if not request["hass_user"].is_admin:
+            raise Unauthorized()
+
+        hass: HomeAssistant = request.app["hass"]
+        homee = next(
+            (
+                h
+                for h in hass.data.get(DOMAIN, {}).values()
+                if h.fanout is not None and h.settings.uid == uid
+            ),
+            None,
+        )
+        if homee is None:
+            return self.json_message("Unknown homee", HTTPStatus.NOT_FOUND)
+
+        ws = web.WebSocketResponse(heartbeat=HEARTBEAT_INTERVAL)
+        await ws.prepare(request)
+
+        queue = homee.fanout.subscribe()
+        reader = asyncio.create_task(_async_discard_incoming(ws, queue))
+        _LOGGER.debug("Consumer %s connected to homee %s", request.remote, uid)
+        try:
+            await ws.send_str(_dumps(get_full_state(homee)))
+            while (data := await queue.get()) is not None:
+                await ws.send_str(data)
+        except ConnectionResetError:
+            pass
+        finally:
+            homee.fanout.unsubscribe(queue)
+            reader.cancel()
+            await ws.close()
+            _LOGGER.debug("Consumer %s disconnected from homee %s", request.remote, uid)
+
+        return ws
+
+
+async def _async_discard_incoming(ws: web.WebSocketResponse, queue: asyncio.Queue):
+    # The stream is read-only, only wait for the consumer to close it
+    async for msg in ws:
+        if msg.type == WSMsgType.ERROR:
+            break
+    _close_queue(queue)
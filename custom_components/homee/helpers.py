@@ -1,11 +1,64 @@
+from contextlib import contextmanager
+import functools
 import inspect
+import logging
+import time
+import weakref
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from pymee import Homee
-from pymee.model import HomeeNode
+from pymee.const import AttributeType, NodeProfile
+from pymee.model import HomeeAttribute, HomeeNode
 
-from .const import CONF_GROUPS, DOMAIN
+from .const import (
+    CONF_EXCLUDE_ATTRIBUTE_TYPES,
+    CONF_EXCLUDE_GROUPS,
+    CONF_EXCLUDE_PROFILES,
+    CONF_GROUPS,
+    CONF_INCLUDE_PROFILES,
+    CONF_WS_COMPRESSION,
+    CONF_WS_MAX_MESSAGE_SIZE,
+    CONF_WS_MAX_QUEUE,
+    CONF_WS_PING_INTERVAL,
+    CONF_WS_PING_TIMEOUT,
+    DEFAULT_WS_COMPRESSION,
+    DEFAULT_WS_MAX_MESSAGE_SIZE,
+    DEFAULT_WS_MAX_QUEUE,
+    DEFAULT_WS_PING_INTERVAL,
+    DEFAULT_WS_PING_TIMEOUT,
+    DOMAIN,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTRIBUTE_TYPE_NAMES = {
+    key: val
+    for key, val in AttributeType.__dict__.items()
+    if not key.startswith("__") and isinstance(val, int)
+}
+
+NODE_PROFILE_NAMES = {
+    key: val
+    for key, val in NodeProfile.__dict__.items()
+    if not key.startswith("__") and isinstance(val, int)
+}
+
+
+def parse_id_list(value: str, names: dict[str, int] = None) -> list[int]:
+    """Parse a comma separated list of ids or, if given, names mapped to ids."""
+    ids = []
+    for item in value.split(","):
+        item = item.strip()
+        if item == "":
+            continue
+        if item.isdigit():
+            ids.append(int(item))
+        elif names is not None and item.upper() in names:
+            ids.append(names[item.upper()])
+        else:
+            _LOGGER.warning("Ignoring unknown homee id or name %s", item)
+    return ids
 
 
 def get_imported_nodes(
@@ -13,23 +66,131 @@ def get_imported_nodes(
 ) -> list[HomeeNode]:
     """Get a list of nodes that should be imported."""
     homee: Homee = hass.data[DOMAIN][config_entry.entry_id]
-    all_groups = [str(g.id) for g in homee.groups]
+    groups_by_id = {str(g.id): g for g in homee.groups}
+    rules = ImportRules(config_entry.options)
+
+    # Add all nodes from the configured groups
+    # A dict keeps the order and makes sure each node is only added once
+    nodes: dict[int, HomeeNode] = {}
+    for group_id in config_entry.options.get(CONF_GROUPS, list(groups_by_id)):
+        group = groups_by_id.get(str(group_id))
+        if group is None:
+            continue
+        for n in group.nodes:
+            nodes.setdefault(n.id, n)
+
+    return [n for n in nodes.values() if rules.includes_node(n)]
+
+
+class ImportRules:
+    """Decide which nodes and attributes are turned into entities.
+
+    The rules are resolved to sets once, so they are applied with set lookups
+    before any entity is created.
+    """
+
+    def __init__(self, options: dict) -> None:
+        """Initialize the rules from the entry options."""
+        include_profiles = parse_id_list(
+            options.get(CONF_INCLUDE_PROFILES, ""), NODE_PROFILE_NAMES
+        )
+        self.include_profiles: frozenset[int] = (
+            frozenset(include_profiles) if include_profiles else None
+        )
+        self.exclude_profiles = frozenset(
+            parse_id_list(options.get(CONF_EXCLUDE_PROFILES, ""), NODE_PROFILE_NAMES)
+        )
+        self.exclude_groups = frozenset(
+            int(g) for g in options.get(CONF_EXCLUDE_GROUPS, [])
+        )
+        self.exclude_attribute_types = frozenset(
+            parse_id_list(
+                options.get(CONF_EXCLUDE_ATTRIBUTE_TYPES, ""), ATTRIBUTE_TYPE_NAMES
+            )
+        )
+
+    def includes_node(self, node: HomeeNode) -> bool:
+        """Return True if entities should be created for the node."""
+        if (
+            self.include_profiles is not None
+            and node.profile not in self.include_profiles
+        ):
+            return False
+        if node.profile in self.exclude_profiles:
+            return False
+        return not any(g.id in self.exclude_groups for g in node.groups)
+
+    def includes_attribute(self, attribute: HomeeAttribute) -> bool:
+        """Return True if an entity should be created for the attribute."""
+        return self.includes_attribute_type(attribute.type)
+
+    def includes_attribute_type(self, attribute_type: int) -> bool:
+        """Return True if entities should be created for attributes of the type.
+
+        Entities of a whole node are checked with the type of their state attribute.
+        """
+        return attribute_type not in self.exclude_attribute_types
+
+
+_homee_data = weakref.WeakKeyDictionary()
+
+
+def get_homee_data(node: HomeeNode) -> dict:
+    """Get the (debug) information about a node and its attributes.
 
-    # Resolve the configured group ids to actual groups
-    groups = [
-        homee.get_group_by_id(int(g))
-        for g in config_entry.options.get(CONF_GROUPS, all_groups)
-    ]
+    The dict is created once per node and shared by all of its entities.
+    """
+    data = _homee_data.get(node)
+    if data is None:
+        data = {
+            "id": node.id,
+            "name": node.name,
+            "profile": node.profile,
+            "attributes": [{"id": a.id, "type": a.type} for a in node.attributes],
+        }
+        _homee_data[node] = data
+    return data
 
-    # Add all nodes from the groups in a list
-    # Make sure each node is only added once
-    nodes: list[HomeeNode] = []
-    for g in groups:
-        for n in g.nodes:
-            if n not in nodes:
-                nodes.append(n)
 
-    return nodes
+def derived_state_property(func):
+    """Cache an entity property until an attribute of its node changes.
+
+    The value is stamped with the state version of the HomeeNodeEntity and
+    only computed again once the version was bumped by a node update.
+    """
+    name = func.__name__
+
+    @functools.wraps(func)
+    def getter(self):
+        cached = self._derived_state.get(name)
+        if cached is not None and cached[0] == self._state_version:
+            return cached[1]
+        value = func(self)
+        self._derived_state[name] = (self._state_version, value)
+        return value
+
+    return property(getter)
+
+
+def get_ws_options(options: dict) -> dict:
+    """Get the keyword arguments for websockets.connect from the entry options.
+
+    A value of 0 disables the respective ping or limit.
+    """
+    compression = options.get(CONF_WS_COMPRESSION, DEFAULT_WS_COMPRESSION)
+    ping_interval = options.get(CONF_WS_PING_INTERVAL, DEFAULT_WS_PING_INTERVAL)
+    ping_timeout = options.get(CONF_WS_PING_TIMEOUT, DEFAULT_WS_PING_TIMEOUT)
+    max_size = options.get(CONF_WS_MAX_MESSAGE_SIZE, DEFAULT_WS_MAX_MESSAGE_SIZE)
+    max_queue = options.get(CONF_WS_MAX_QUEUE, DEFAULT_WS_MAX_QUEUE)
+
+    return {
+        "compression": "deflate" if compression else None,
+        "ping_interval": ping_interval or None,
+        "ping_timeout": ping_timeout or None,
+        "max_size": int(max_size * 1024 * 1024) or None,
+        "max_queue": max_queue or None,
+    }
+
 
 def get_attribute_for_enum(att_class,att_id):
     attributes = [a for a in inspect.getmembers(att_class, lambda a: not (inspect.isroutine(a)))
@@ -39,3 +200,53 @@ def get_attribute_for_enum(att_class,att_id):
         return None
     return attribute_label[0]
 
+
+class SetupTimer:
+    """Record the duration of the setup phases of a homee entry."""
+
+    def __init__(self) -> None:
+        """Initialize the timer and start measuring the total setup time."""
+        self.phases: dict[str, float] = {}
+        self.entities: dict[str, int] = {}
+        self.total: float = None
+        self._start = time.monotonic()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Measure the duration of the wrapped block as the given phase."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.phases[name] = round(time.monotonic() - start, 3)
+
+    def finish(self):
+        """Store the total setup time once the setup is complete."""
+        self.total = round(time.monotonic() - self._start, 3)
+
+    def summary(self) -> str:
+        """Format the phases and entity counts as a single line."""
+        phases = ", ".join(f"{k}={v}s" for k, v in self.phases.items())
+        entities = ", ".join(f"{k}={v}" for k, v in self.entities.items())
+        return f"total={self.total}s, phases: {phases}, entities: {entities}"
+
+
+def timed_platform_setup(func):
+    """Record the duration and entity count of a platform's async_setup_entry."""
+    platform = func.__module__.rsplit(".", 1)[-1]
+
+    @functools.wraps(func)
+    async def wrapper(
+        hass: HomeAssistant, config_entry: ConfigEntry, async_add_devices
+    ):
+        timer: SetupTimer = hass.data[DOMAIN][config_entry.entry_id].setup_timer
+        timer.entities[platform] = 0
+
+        def add_devices(devices, *args, **kwargs):
+            timer.entities[platform] += len(devices)
+            async_add_devices(devices, *args, **kwargs)
+
+        with timer.phase(f"platform_{platform}"):
+            return await func(hass, config_entry, add_devices)
+
+    return wrapper
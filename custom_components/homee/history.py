@@ -0,0 +1,210 @@
+"""Import the attribute history stored on the homee cube into external statistics."""
+from datetime import datetime, timezone
+import logging
+import time
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.storage import Store
+from pymee.const import AttributeType
+
+from .connection import HomeeConnection
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+HISTORY_ATTRIBUTES = [
+    AttributeType.CURRENT_ENERGY_USE,
+    AttributeType.ACCUMULATED_ENERGY_USE,
+]
+
+STORAGE_KEY = f"{DOMAIN}.history_import"
+STORAGE_VERSION = 1
+
+HOUR = 3600
+
+
+def parse_history_points(history: dict) -> list[tuple[int, float]]:
+    """Get the (timestamp, value) points of a history message, oldest first."""
+    points = []
+    for point in history.get("data", []):
+        if isinstance(point, dict):
+            points.append((int(point["timestamp"]), float(point["value"])))
+        else:
+            points.append((int(point[0]), float(point[1])))
+    points.sort()
+    return points
+
+
+class HourlyDownsampler:
+    """Downsample history points to hourly statistics.
+
+    Points are only turned into statistics once a point of a later hour was seen,
+    so an hour that spans two history pages is not imported twice.
+    """
+
+    def __init__(self, total_increasing: bool, state: dict = None) -> None:
+        """Initialize the downsampler, optionally resuming from a saved state."""
+        state = state or {}
+        self.total_increasing = total_increasing
+        self.last_value: float = state.get("last_value")
+        self.sum: float = state.get("sum", 0.0)
+        self._hour: int = None
+        self._values: list[float] = []
+
+    @property
+    def state(self) -> dict:
+        """The state after the last completed hour, used to resume the import."""
+        return {"last_value": self.last_value, "sum": self.sum}
+
+    @property
+    def pending_hour(self) -> int:
+        """The start of the hour that is not completed yet."""
+        return self._hour
+
+    def add(self, points: list[tuple[int, float]]) -> list[StatisticData]:
+        """Add points and return the statistics of all completed hours."""
+        statistics = []
+        for timestamp, value in points:
+            hour = timestamp - timestamp % HOUR
+            if self._hour is not None and hour != self._hour:
+                statistics.append(self._complete_hour())
+            self._hour = hour
+            self._values.append(value)
+        return statistics
+
+    def flush(self, end: int) -> list[StatisticData]:
+        """Return the statistics of the pending hour if it ended before end."""
+        if self._hour is None or self._hour + HOUR > end:
+            return []
+        return [self._complete_hour()]
+
+    def _complete_hour(self) -> StatisticData:
+        start = datetime.fromtimestamp(self._hour, timezone.utc)
+        values = self._values
+        self._values = []
+
+        if not self.total_increasing:
+            return StatisticData(
+                start=start,
+                mean=sum(values) / len(values),
+                min=min(values),
+                max=max(values),
+            )
+
+        for value in values:
+            if self.last_value is not None:
+                # A decreasing total means the meter was reset
+                delta = value - self.last_value
+                self.sum += delta if delta >= 0 else value
+            self.last_value = value
+
+        return StatisticData(start=start, state=values[-1], sum=self.sum)
+
+
+async def async_import_history(
+    hass: HomeAssistant,
+    homee: HomeeConnection,
+    entity_id: str,
+    days: int,
+    page_size: int,
+    restart: bool = False,
+) -> dict:
+    """Import the history of a homee energy sensor into external statistics.
+
+    The statistics are kept apart from the ones the recorder compiles for the
+    sensor, so an imported sum never clashes with the sum of the recorder. The
+    history is fetched in pages of page_size points. The progress is saved
+    after each page, so an interrupted import continues where it stopped.
+    """
+    node, attribute = _get_sensor_attribute(hass, homee, entity_id)
+    total_increasing = attribute.type == AttributeType.ACCUMULATED_ENERGY_USE
+
+    store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+    progress = await store.async_load() or {}
+
+    end = int(time.time())
+    start = end - days * 24 * HOUR
+    saved = progress.get(entity_id)
+    if saved is not None and not restart:
+        start = saved["resume_from"]
+        downsampler = HourlyDownsampler(total_increasing, saved["state"])
+    else:
+        downsampler = HourlyDownsampler(total_increasing)
+
+    state = hass.states.get(entity_id)
+    statistic_id = get_statistic_id(homee, node.id, attribute.id)
+    metadata = StatisticMetaData(
+        has_mean=not total_increasing,
+        has_sum=total_increasing,
+        name=state.name if state is not None else entity_id,
+        source=DOMAIN,
+        statistic_id=statistic_id,
+        unit_of_measurement=attribute.unit,
+    )
+
+    imported_hours = 0
+    page_start = start
+    while page_start < end:
+        history = await homee.get_attribute_history(
+            node.id, attribute.id, page_start, end, page_size
+        )
+        points = [p for p in parse_history_points(history) if p[0] >= page_start]
+        last_page = len(points) < page_size
+
+        statistics = downsampler.add(points)
+        if last_page:
+            # The current hour is left to the recorder
+            statistics += downsampler.flush(end)
+        if statistics:
+            async_add_external_statistics(hass, metadata, statistics)
+            imported_hours += len(statistics)
+
+        if last_page:
+            progress.pop(entity_id, None)
+        else:
+            progress[entity_id] = {
+                "resume_from": downsampler.pending_hour,
+                "state": downsampler.state,
+            }
+        await store.async_save(progress)
+
+        _LOGGER.info(
+            "Imported %s hours of homee history for %s up to %s",
+            imported_hours,
+            entity_id,
+            datetime.fromtimestamp(points[-1][0]) if points else "now",
+        )
+
+        if last_page:
+            break
+        page_start = points[-1][0] + 1
+
+    return {
+        "entity_id": entity_id,
+        "statistic_id": statistic_id,
+        "imported_hours": imported_hours,
+    }
+
+
+def get_statistic_id(homee: HomeeConnection, node_id: int, attribute_id: int) -> str:
+    """The id of the external statistic of an attribute, scoped to the homee."""
+    return f"{DOMAIN}:{homee.settings.uid.lower()}_{node_id}_{attribute_id}"
+
+
+def _get_sensor_attribute(hass: HomeAssistant, homee: HomeeConnection, entity_id):
+    """Find the node and attribute of a homee sensor entity."""
+    entry = er.async_get(hass).async_get(entity_id)
+    if entry is None or entry.platform != DOMAIN or "-sensor-" not in entry.unique_id:
+        raise HomeAssistantError(f"{entity_id} is not a homee sensor")
+
+    node_id, _, attribute_id = entry.unique_id.split("-")
+    node = homee.get_node_by_id(int(node_id))
+    attribute = node.get_attribute_by_id(int(attribute_id)) if node else None
+    if attribute is None or attribute.type not in HISTORY_ATTRIBUTES:
+        raise HomeAssistantError(f"{entity_id} has no importable homee history")
+
+    return node, attribute
@@ -0,0 +1,109 @@
+"""Run the websocket of a homee connection on a dedicated thread."""
+import asyncio
+from collections import deque
+import logging
+import threading
+
+_LOGGER = logging.getLogger(__name__)
+
+EVENT_OPEN = "open"
+EVENT_MESSAGE = "message"
+EVENT_ATTRIBUTES = "attributes"
+EVENT_CLOSED = "closed"
+
+
+class DeltaQueue:
+    """Thread-safe queue from the I/O thread to the event loop.
+
+    Consecutive attribute updates are collected in one batch per attribute id,
+    so an attribute that changes several times before the event loop gets to
+    it is only applied once with its latest data.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Initialize the queue for the consuming event loop."""
+        self.coalesced = 0
+        self._loop = loop
+        self._lock = threading.Lock()
+        self._events = deque()
+        self._attributes: dict[int, dict] = None
+        self._wakeup_scheduled = False
+        self._waiter: asyncio.Future = None
+
+    def put(self, event: str, data=None):
+        """Add an event. Called from the I/O thread."""
+        with self._lock:
+            self._events.append((event, data))
+            self._attributes = None
+            self._schedule_wakeup()
+
+    def put_attribute(self, attribute: dict):
+        """Add an attribute update. Called from the I/O thread."""
+        with self._lock:
+            if self._attributes is None:
+                self._attributes = {}
+                self._events.append((EVENT_ATTRIBUTES, self._attributes))
+            elif attribute["id"] in self._attributes:
+                self.coalesced += 1
+            self._attributes[attribute["id"]] = attribute
+            self._schedule_wakeup()
+
+    def _schedule_wakeup(self):
+        if not self._wakeup_scheduled:
+            self._wakeup_scheduled = True
+            self._loop.call_soon_threadsafe(self._wakeup)
+
+    def _wakeup(self):
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def get(self) -> list[tuple]:
+        """Wait for and return all queued events. Called from the event loop."""
+        while True:
+            with self._lock:
+                self._wakeup_scheduled = False
+                if self._events:
+                    events = list(self._events)
+                    self._events.clear()
+                    self._attributes = None
+                    return events
+
+            self._waiter = self._loop.create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+
+
+class HomeeIOThread:
+    """A thread with its own event loop for the websocket of one homee."""
+
+    def __init__(self, name: str) -> None:
+        """Initialize the thread, which is started with start()."""
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        """Start the thread and its event loop."""
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    def run_coroutine(self, coro) -> asyncio.Future:
+        """Run a coroutine on the thread and return an awaitable for its result."""
+        return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+    def call_soon(self, callback, *args):
+        """Call a function on the thread."""
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def stop(self):
+        """Stop the event loop and wait for the thread to end. Blocks."""
+        if self._thread.is_alive():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
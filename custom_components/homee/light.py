@@ -50,38 +50,29 @@ def get_light_features(node: HomeeNodeEntity, default=0) -> int:
     return features
 
 
-def get_light_attribute_sets(node: HomeeNodeEntity, index: int):
+def get_light_attribute_sets(node: HomeeNodeEntity) -> list[dict]:
     """Returns a list with the attributes for each light entity to be created"""
+    attributes_by_id = {a.id: a for a in node.attributes}
     on_off_attributes = [
         i for i in node.attributes if i.type == AttributeType.ON_OFF and i.editable
     ]
 
-    try:
-        target_light = on_off_attributes[index]
-    except IndexError:
-        return None
-
-    light = {AttributeType.ON_OFF: target_light}
-    # go through the next attributes by id until we hit none, on-off or non-light attribute
-    # assumption: related homee light attribute ids appear to be sequential
-    # e.g. on-off:id1, dimmer:id2, on-off:id3, dimmer:id4
-    lookup_offset = 1
-    next_id_valid = True
-    while next_id_valid:
-        attribute_with_next_id = [
-            i for i in node.attributes if i.id == (target_light.id + lookup_offset)
-        ]
-        if not attribute_with_next_id:
-            next_id_valid = False
-            break
-        if attribute_with_next_id[0].type not in LIGHT_ATTRIBUTES:
-            next_id_valid = False
-            break
-        else:
-            light.update({attribute_with_next_id[0].type: attribute_with_next_id[0]})
-            lookup_offset += 1
+    lights = []
+    for target_light in on_off_attributes:
+        light = {AttributeType.ON_OFF: target_light}
+        # go through the next attributes by id until we hit none, on-off or non-light attribute
+        # assumption: related homee light attribute ids appear to be sequential
+        # e.g. on-off:id1, dimmer:id2, on-off:id3, dimmer:id4
+        next_id = target_light.id + 1
+        while (
+            next_id in attributes_by_id
+            and attributes_by_id[next_id].type in LIGHT_ATTRIBUTES
+        ):
+            light[attributes_by_id[next_id].type] = attributes_by_id[next_id]
+            next_id += 1
+        lights.append(light)
 
-    return light
+    return lights
 
 
 def rgb_list_to_decimal(color):
@@ -94,22 +85,19 @@ def decimal_to_rgb_list(color):
     return [(color & 0xFF0000) >> 16, (color & 0x00FF00) >> 8, (color & 0x0000FF)]
 
 
+@helpers.timed_platform_setup
 async def async_setup_entry(hass, config_entry, async_add_devices):
     """Add the homee platform for the light integration."""
 
     devices = []
+    rules = helpers.ImportRules(config_entry.options)
     for node in helpers.get_imported_nodes(hass, config_entry):
         if not is_light_node(node):
             continue
-        index = 0
-        attributes_exhausted = False
-        while not attributes_exhausted:
-            light_set = get_light_attribute_sets(node, index)
-            if light_set is not None:
+        for index, light_set in enumerate(get_light_attribute_sets(node)):
+            # The index stays the same, it is part of the unique id
+            if rules.includes_attribute(light_set[AttributeType.ON_OFF]):
                 devices.append(HomeeLight(node, light_set, index, config_entry))
-                index += 1
-            else:
-                attributes_exhausted = True
 
     if devices:
         async_add_devices(devices)
@@ -177,7 +165,7 @@ class HomeeLight(HomeeNodeEntity, LightEntity):
         """Return the brightness of the light."""
         return self._dimmer_attr.current_value * 2.55
 
-    @property
+    @helpers.derived_state_property
     def hs_color(self):
         """Return the color of the light."""
         # Handle color temperature mode
@@ -201,7 +189,7 @@ class HomeeLight(HomeeNodeEntity, LightEntity):
         """Return the maximum mireds of the light."""
         return HOMEE_LIGHT_MAX_MIRED
 
-    @property
+    @helpers.derived_state_property
     def color_temp(self):
         """Return the color temperature of the light."""
         return color_temperature_kelvin_to_mired(
@@ -0,0 +1,69 @@
+"""Profile the homee integration while Home Assistant is running."""
+import asyncio
+import cProfile
+import logging
+import os
+import pstats
+import time
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+_LOGGER = logging.getLogger(__name__)
+
+INTEGRATION_DIR = os.path.dirname(__file__)
+PROFILE_FILE = "homee_profile_{}.pstats"
+
+_profiling_lock = asyncio.Lock()
+
+
+async def async_profile(hass: HomeAssistant, seconds: float, top: int) -> dict:
+    """Profile the event loop for the given amount of seconds.
+
+    The full profile is written as pstats file to the config directory. The
+    returned summary only contains the most expensive functions of this
+    integration, e.g. node listeners and entity property getters.
+    """
+    if _profiling_lock.locked():
+        raise ProfilerRunningException()
+
+    async with _profiling_lock:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+
+    path = hass.config.path(PROFILE_FILE.format(int(time.time())))
+    functions = await hass.async_add_executor_job(_write_report, profiler, path, top)
+    _LOGGER.info("Wrote homee profile to %s", path)
+
+    return {"file": path, "seconds": seconds, "functions": functions}
+
+
+def _write_report(profiler: cProfile.Profile, path: str, top: int) -> list[dict]:
+    """Dump the profile and summarize the integration functions. Runs in the executor."""
+    profiler.dump_stats(path)
+    stats = pstats.Stats(profiler)
+
+    functions = []
+    for (filename, line, name), entry in stats.stats.items():
+        if not filename.startswith(INTEGRATION_DIR):
+            continue
+        _, calls, total_time, cumulative_time, _ = entry
+        functions.append(
+            {
+                "function": f"{os.path.basename(filename)}:{line}({name})",
+                "calls": calls,
+                "total_time": round(total_time, 6),
+                "cumulative_time": round(cumulative_time, 6),
+            }
+        )
+    functions.sort(key=lambda f: f["cumulative_time"], reverse=True)
+
+    return functions[:top]
+
+
+class ProfilerRunningException(HomeAssistantError):
+    """Raised if a profile is requested while another one is still running."""
@@ -0,0 +1,8 @@
+"""Integration platform for recorder."""
+from homeassistant.core import HomeAssistant, callback
+
+
+@callback
+def exclude_attributes(hass: HomeAssistant) -> set[str]:
+    """Exclude the static homee_data attribute from being recorded in the database."""
+    return {"homee_data"}
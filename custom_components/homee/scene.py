@@ -0,0 +1,59 @@
+"""The homee scene platform for homeegrams."""
+
+import logging
+
+from homeassistant.components.scene import Scene
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from . import helpers
+from .connection import HomeeConnection, HomeeHomeegram
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@helpers.timed_platform_setup
+async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_devices):
+    """Add the homee platform for the scene component."""
+    homee: HomeeConnection = hass.data[DOMAIN][config_entry.entry_id]
+
+    devices = [
+        HomeegramScene(homee, homeegram) for homeegram in homee.homeegrams.values()
+    ]
+    if devices:
+        async_add_devices(devices)
+
+
+async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Unload a config entry."""
+    return True
+
+
+class HomeegramScene(Scene):
+    """Representation of a homeegram that is played on the homee cube."""
+
+    _attr_has_entity_name = True
+
+    def __init__(self, homee: HomeeConnection, homeegram: HomeeHomeegram) -> None:
+        """Initialize a homeegram scene."""
+        self._homee = homee
+        self._homeegram = homeegram
+
+        # Homeegram ids are only unique on one homee
+        self._attr_unique_id = f"{homee.settings.uid}-homeegram-{homeegram.id}"
+        self._attr_device_info = {"identifiers": {(DOMAIN, homee.deviceId)}}
+
+    @property
+    def name(self):
+        """Return the name of the homeegram."""
+        return self._homeegram.name
+
+    @property
+    def extra_state_attributes(self):
+        """Return the id of the homeegram for use with the play_homeegram service."""
+        return {"homeegram_id": self._homeegram.id}
+
+    async def async_activate(self, **kwargs):
+        """Play the homeegram on the homee cube."""
+        await self._homee.play_homeegram(self._homeegram.id)
@@ -5,66 +5,119 @@ import logging
 from homeassistant.core import HomeAssistant
 from homeassistant.components.sensor import (
     SensorEntity,
+    SensorEntityDescription,
     SensorDeviceClass,
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory
 from pymee.const import AttributeType
 from pymee.model import HomeeAttribute, HomeeNode
 
 from . import HomeeNodeEntity, helpers
+from .aggregates import (
+    ATTRIBUTE_TYPE_NAMES_BY_TYPE,
+    FUNCTION_MAX,
+    FUNCTION_MIN,
+    FUNCTION_SUM,
+    GroupAggregate,
+    GroupAggregateEntity,
+    get_group_aggregates,
+)
+from .connection import HomeeConnection
+from .const import DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
 
-VALID_ATTRIBUTES = [
-    AttributeType.CURRENT_ENERGY_USE,
-    AttributeType.ACCUMULATED_ENERGY_USE,
-    AttributeType.POSITION,
-    AttributeType.UP_DOWN,
-]
-
-MEASUREMENT_ATTRIBUTES = [
-    AttributeType.CURRENT_ENERGY_USE,
-    AttributeType.POSITION,
-    AttributeType.UP_DOWN,
-]
-
-
-def get_device_class(attribute: HomeeAttribute) -> int:
-    """Determine the device class a homee node based on the node profile."""
-    if attribute.type == AttributeType.CURRENT_ENERGY_USE:
-        return SensorDeviceClass.POWER
-
-    if attribute.type == AttributeType.ACCUMULATED_ENERGY_USE:
-        return SensorDeviceClass.ENERGY
-
-    return None
 
-
-def get_state_class(attribute: HomeeAttribute) -> int:
-    """Determine the device class a homee node based on the node profile."""
-    if attribute.type in MEASUREMENT_ATTRIBUTES:
-        return SensorStateClass.MEASUREMENT
-
-    if attribute.type == AttributeType.ACCUMULATED_ENERGY_USE:
-        return SensorStateClass.TOTAL_INCREASING
-
-    return None
+def _description(
+    attribute_type: int,
+    device_class: SensorDeviceClass = None,
+    state_class: SensorStateClass = SensorStateClass.MEASUREMENT,
+    entity_category: EntityCategory = None,
+    name: str = None,
+) -> tuple[int, SensorEntityDescription]:
+    """Describe the sensor of an attribute type, named after its device class or type."""
+    key = ATTRIBUTE_TYPE_NAMES_BY_TYPE[attribute_type]
+    return attribute_type, SensorEntityDescription(
+        key=key,
+        name=name or (str(device_class) if device_class else key),
+        device_class=device_class,
+        state_class=state_class,
+        entity_category=entity_category,
+    )
+
+
+# The sensors created per attribute type, shared by all sensor entities
+SENSOR_DESCRIPTIONS: dict[int, SensorEntityDescription] = dict(
+    [
+        _description(AttributeType.CURRENT_ENERGY_USE, SensorDeviceClass.POWER),
+        _description(
+            AttributeType.ACCUMULATED_ENERGY_USE,
+            SensorDeviceClass.ENERGY,
+            SensorStateClass.TOTAL_INCREASING,
+        ),
+        _description(
+            AttributeType.TOTAL_CURRENT_ENERGY_USE,
+            SensorDeviceClass.POWER,
+            name="total power",
+        ),
+        _description(
+            AttributeType.TOTAL_ACCUMULATED_ENERGY_USE,
+            SensorDeviceClass.ENERGY,
+            SensorStateClass.TOTAL_INCREASING,
+            name="total energy",
+        ),
+        _description(AttributeType.POSITION),
+        _description(AttributeType.UP_DOWN),
+        _description(AttributeType.TEMPERATURE, SensorDeviceClass.TEMPERATURE),
+        _description(
+            AttributeType.OUTDOOR_TEMPERATURE,
+            SensorDeviceClass.TEMPERATURE,
+            name="outdoor temperature",
+        ),
+        _description(AttributeType.RELATIVE_HUMIDITY, SensorDeviceClass.HUMIDITY),
+        _description(
+            AttributeType.OUTDOOR_RELATIVE_HUMIDITY,
+            SensorDeviceClass.HUMIDITY,
+            name="outdoor humidity",
+        ),
+        _description(AttributeType.BRIGHTNESS, SensorDeviceClass.ILLUMINANCE),
+        _description(AttributeType.BATTERY_LEVEL, SensorDeviceClass.BATTERY),
+        _description(AttributeType.VOLTAGE, SensorDeviceClass.VOLTAGE),
+        _description(AttributeType.CURRENT, SensorDeviceClass.CURRENT),
+        _description(AttributeType.CO2LEVEL, SensorDeviceClass.CO2),
+        _description(AttributeType.PRESSURE, SensorDeviceClass.PRESSURE),
+        _description(
+            AttributeType.LINK_QUALITY, entity_category=EntityCategory.DIAGNOSTIC
+        ),
+    ]
+)
 
 
+@helpers.timed_platform_setup
 async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_devices):
     """Add the homee platform for the sensor components."""
 
     devices = []
+    rules = helpers.ImportRules(config_entry.options)
     for node in helpers.get_imported_nodes(hass, config_entry):
         sensor_type_counts = {}
         for attribute in node.attributes:
             if attribute.type not in sensor_type_counts:
                 sensor_type_counts[attribute.type] = 0
-            if attribute.type in VALID_ATTRIBUTES:
+            if attribute.type in SENSOR_DESCRIPTIONS and rules.includes_attribute(
+                attribute
+            ):
                 sensor_index = sensor_type_counts[attribute.type]
                 devices.append(HomeeSensor(node, config_entry, attribute, sensor_index))
                 sensor_type_counts[attribute.type] += 1
+
+    homee: HomeeConnection = hass.data[DOMAIN][config_entry.entry_id]
+    for aggregate in get_group_aggregates(homee, config_entry.options, binary=False):
+        for function in [FUNCTION_SUM, FUNCTION_MIN, FUNCTION_MAX]:
+            devices.append(HomeeGroupAggregateSensor(homee, aggregate, function))
+
     if devices:
         async_add_devices(devices)
 
@@ -89,23 +142,18 @@ class HomeeSensor(HomeeNodeEntity, SensorEntity):
         """Initialize a homee sensor entity."""
         HomeeNodeEntity.__init__(self, node, self, entry)
         self._measurement = measurement_attribute
-        self._device_class = get_device_class(measurement_attribute)
-        self._state_class = get_state_class(measurement_attribute)
         self._sensor_index = sensor_index
+        self.entity_description = SENSOR_DESCRIPTIONS[measurement_attribute.type]
 
         self._unique_id = f"{self._node.id}-sensor-{self._measurement.id}"
 
-    @property
+    @helpers.derived_state_property
     def name(self):
         """Return the display name of this entity."""
         if self._measurement.name not in ["", "None"]:
             name = f"{self._measurement.name}"
-        elif self._device_class:
-            name = f"{self._device_class}"
         else:
-            for key, val in AttributeType.__dict__.items():
-                if val == self._measurement.type:
-                    name = f"{key}"
+            name = self.entity_description.name
 
         if self._sensor_index > 0:
             name = f"{name} {self._sensor_index + 1}"
@@ -120,11 +168,25 @@ class HomeeSensor(HomeeNodeEntity, SensorEntity):
     def native_unit_of_measurement(self):
         return self._measurement.unit
 
-    @property
-    def state_class(self):
-        return self._state_class
+
+class HomeeGroupAggregateSensor(GroupAggregateEntity, SensorEntity):
+    """Representation of the sum, min or max of an attribute type in a homee group."""
+
+    def __init__(
+        self, homee: HomeeConnection, aggregate: GroupAggregate, function: str
+    ) -> None:
+        """Initialize a homee group aggregate sensor."""
+        GroupAggregateEntity.__init__(self, homee, aggregate, function)
+
+        self._attr_native_unit_of_measurement = aggregate.attributes[0].unit
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+
+        description = SENSOR_DESCRIPTIONS.get(aggregate.attribute_type)
+        if description is not None:
+            self._attr_device_class = description.device_class
+            if function == FUNCTION_SUM:
+                self._attr_state_class = description.state_class
 
     @property
-    def device_class(self):
-        """Return the class of this node."""
-        return self._device_class
+    def native_value(self):
+        return self._aggregate.value(self._function)
@@ -65,16 +65,22 @@ def is_switch_node(node: HomeeNode):
     return False
 
 
+@helpers.timed_platform_setup
 async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_devices):
     """Add the homee platform for the switch component."""
 
     devices = []
+    rules = helpers.ImportRules(config_entry.options)
     for node in helpers.get_imported_nodes(hass, config_entry):
         if not is_switch_node(node):
             continue
         switch_count = 0
         for attribute in node.attributes:
-            if attribute.type in HOMEE_SWITCH_ATTRIBUTES and attribute.editable:
+            if (
+                attribute.type in HOMEE_SWITCH_ATTRIBUTES
+                and attribute.editable
+                and rules.includes_attribute(attribute)
+            ):
                 devices.append(HomeeSwitch(node, config_entry, attribute, switch_count))
                 switch_count += 1
     if devices:
@@ -106,7 +112,7 @@ class HomeeSwitch(HomeeNodeEntity, SwitchEntity):
 
         self._unique_id = f"{self._node.id}-switch-{self._on_off.id}"
 
-    @property
+    @helpers.derived_state_property
     def name(self):
         """Return the display name of this entity. Entity is the main feature of a device when the index == 0"""
         for key, val in AttributeType.__dict__.items():
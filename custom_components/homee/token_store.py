@@ -0,0 +1,26 @@
+"""Persist homee access tokens in the .storage directory."""
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+STORAGE_VERSION = 1
+
+
+def _get_store(hass: HomeAssistant, uid: str) -> Store:
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.token.{uid}", private=True)
+
+
+async def async_load_token(hass: HomeAssistant, uid: str) -> dict:
+    """Load the stored token and its expiry timestamp for a homee."""
+    return await _get_store(hass, uid).async_load()
+
+
+async def async_save_token(hass: HomeAssistant, uid: str, token: str, expires: float):
+    """Store the token and its expiry timestamp for a homee."""
+    await _get_store(hass, uid).async_save({"token": token, "expires": expires})
+
+
+async def async_remove_token(hass: HomeAssistant, uid: str):
+    """Remove the stored token of a homee."""
+    await _get_store(hass, uid).async_remove()
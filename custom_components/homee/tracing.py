@@ -0,0 +1,135 @@
+"""Trace commands from the entity method to the confirmed state."""
+from collections import deque
+import logging
+import time
+import uuid
+
+_LOGGER = logging.getLogger(__name__)
+
+TRACE_BUFFER_SIZE = 50
+
+# Commands that are not confirmed within this time are no longer matched
+TRACE_TIMEOUT = 120
+
+STAGE_ENTITY = "entity"
+STAGE_SERVICE = "service"
+STAGE_QUEUED = "queued"
+STAGE_SEND = "send"
+STAGE_DROPPED = "dropped"
+STAGE_ECHO = "echo"
+STAGE_CONFIRMED = "confirmed"
+STAGE_STATE_WRITTEN = "state_written"
+
+
+class CommandTrace:
+    """The stages of one command with their time since the command was started."""
+
+    def __init__(self, node_id: int, attribute_id: int, value: float) -> None:
+        """Start the trace of a command."""
+        self.id = uuid.uuid4().hex[:12]
+        self.node_id = node_id
+        self.attribute_id = attribute_id
+        self.value = value
+        self.context_id: str = None
+        self.started = time.time()
+        self.stages: list[tuple[str, float]] = []
+        self._start = time.monotonic()
+
+    def mark(self, stage: str):
+        """Record that the command reached a stage."""
+        self.stages.append((stage, round((time.monotonic() - self._start) * 1000, 1)))
+
+    def has_stage(self, stage: str) -> bool:
+        """Check if the command reached a stage."""
+        return any(s == stage for s, _ in self.stages)
+
+    @property
+    def expired(self) -> bool:
+        """True if the command is too old to be matched to an update."""
+        return time.monotonic() - self._start > TRACE_TIMEOUT
+
+    def as_dict(self) -> dict:
+        """Return the trace for the diagnostics, with the stage times in ms."""
+        return {
+            "id": self.id,
+            "context_id": self.context_id,
+            "node": self.node_id,
+            "attribute": self.attribute_id,
+            "value": self.value,
+            "started": self.started,
+            "stages": dict(self.stages),
+        }
+
+
+class CommandTracer:
+    """Keep the most recent command traces in a ring buffer.
+
+    Traces are correlated by attribute id: a new command for an attribute
+    replaces the pending trace of the previous one.
+    """
+
+    def __init__(self, size: int = TRACE_BUFFER_SIZE) -> None:
+        """Initialize the tracer with an empty buffer."""
+        self.traces: deque[CommandTrace] = deque(maxlen=size)
+        self._pending: dict[int, CommandTrace] = {}
+        # The confirmed trace while its attribute update is applied
+        self.writing: CommandTrace = None
+
+    def start(
+        self, node_id: int, attribute_id: int, value: float, stage: str
+    ) -> CommandTrace:
+        """Start the trace of a command at its first stage."""
+        for pending_id in [k for k, t in self._pending.items() if t.expired]:
+            del self._pending[pending_id]
+
+        trace = CommandTrace(node_id, attribute_id, value)
+        trace.mark(stage)
+        self.traces.append(trace)
+        self._pending[attribute_id] = trace
+        return trace
+
+    def service_called(
+        self, node_id: int, attribute_id: int, value: float, context_id: str
+    ) -> CommandTrace:
+        """Mark the service stage, starting a trace if no entity started one."""
+        trace = self._pending.get(attribute_id)
+        if trace is None or trace.value != value or trace.has_stage(STAGE_SERVICE):
+            trace = self.start(node_id, attribute_id, value, STAGE_SERVICE)
+        else:
+            trace.mark(STAGE_SERVICE)
+        trace.context_id = context_id
+        return trace
+
+    def mark(self, attribute_id: int, stage: str):
+        """Mark a stage of the pending command of an attribute, if any."""
+        trace = self._pending.get(attribute_id)
+        if trace is not None:
+            trace.mark(stage)
+
+    def drop(self, attribute_id: int):
+        """Mark that the pending command of an attribute was not sent.
+
+        The trace is no longer matched to attribute updates.
+        """
+        trace = self._pending.pop(attribute_id, None)
+        if trace is not None:
+            trace.mark(STAGE_DROPPED)
+
+    def attribute_updated(self, data) -> CommandTrace:
+        """Match an attribute update to the pending command of the attribute.
+
+        Returns the trace if the update confirms the value of the command.
+        """
+        trace = self._pending.get(data["id"])
+        if trace is None:
+            return None
+
+        if not trace.has_stage(STAGE_ECHO):
+            trace.mark(STAGE_ECHO)
+        if data["current_value"] != trace.value:
+            return None
+
+        del self._pending[data["id"]]
+        trace.mark(STAGE_CONFIRMED)
+        _LOGGER.debug("Command %s confirmed: %s", trace.id, trace.stages)
+        return trace
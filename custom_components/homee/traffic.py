@@ -0,0 +1,172 @@
+"""Record and replay the raw websocket traffic of a homee connection."""
+import asyncio
+from collections import deque
+from datetime import timedelta
+import gzip
+import logging
+import os
+import struct
+import time
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+_LOGGER = logging.getLogger(__name__)
+
+DIRECTION_INBOUND = b"I"
+DIRECTION_OUTBOUND = b"O"
+
+# Each record is a header (timestamp, direction, payload length) followed by the
+# utf-8 encoded payload.
+RECORD_HEADER = struct.Struct(">dcI")
+
+FLUSH_INTERVAL = timedelta(seconds=5)
+MAX_BUFFERED_MESSAGES = 5000
+MAX_FILE_SIZE = 5 * 1024 * 1024
+BACKUP_COUNT = 3
+
+
+class TrafficRecorder:
+    """Write inbound and outbound homee messages to a rotating, compressed file."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        path: str,
+        max_buffered: int = MAX_BUFFERED_MESSAGES,
+        max_file_size: int = MAX_FILE_SIZE,
+        backup_count: int = BACKUP_COUNT,
+    ) -> None:
+        """Initialize the recorder. Messages are only kept in memory until flushed."""
+        self.hass = hass
+        self.path = path
+        self.max_file_size = max_file_size
+        self.backup_count = backup_count
+        self.dropped = 0
+        self.written = 0
+
+        self._buffer = deque(maxlen=max_buffered)
+        self._flushing = False
+        self._remove_interval = None
+
+    @callback
+    def async_start(self):
+        """Start flushing the buffered messages periodically."""
+        self._remove_interval = async_track_time_interval(
+            self.hass, self._async_flush, FLUSH_INTERVAL
+        )
+
+    async def async_stop(self):
+        """Stop the periodic flush and write all remaining messages."""
+        if self._remove_interval is not None:
+            self._remove_interval()
+            self._remove_interval = None
+        await self._async_flush()
+
+    def record_inbound(self, msg: str):
+        """Record a message received from homee."""
+        self._record(DIRECTION_INBOUND, msg)
+
+    def record_outbound(self, msg: str):
+        """Record a message sent to homee."""
+        self._record(DIRECTION_OUTBOUND, msg)
+
+    def _record(self, direction: bytes, msg: str):
+        # The buffer is bounded, the oldest messages are dropped if the disk
+        # can not keep up.
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append((time.time(), direction, msg))
+
+    async def _async_flush(self, *_):
+        if self._flushing or not self._buffer:
+            return
+
+        records = list(self._buffer)
+        self._buffer.clear()
+
+        self._flushing = True
+        try:
+            await self.hass.async_add_executor_job(self._write, records)
+            self.written += len(records)
+        except OSError as err:
+            _LOGGER.error("Unable to write homee traffic to %s: %s", self.path, err)
+        finally:
+            self._flushing = False
+
+    def _write(self, records):
+        """Append the records to the recording file. Runs in the executor."""
+        if (
+            os.path.exists(self.path)
+            and os.path.getsize(self.path) >= self.max_file_size
+        ):
+            self._rotate()
+
+        # Every flush appends a new gzip member, which gzip reads back as one stream.
+        with gzip.open(self.path, "ab") as file:
+            for timestamp, direction, msg in records:
+                payload = msg.encode("utf-8")
+                file.write(RECORD_HEADER.pack(timestamp, direction, len(payload)))
+                file.write(payload)
+
+    def _rotate(self):
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+def get_recording_files(path: str) -> list[str]:
+    """Return the recording file and its rotated backups, oldest first."""
+    files = []
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        files.insert(0, f"{path}.{index}")
+        index += 1
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def read_recording(path: str):
+    """Yield (timestamp, direction, message) tuples from a recording and its backups."""
+    for file_path in get_recording_files(path):
+        with gzip.open(file_path, "rb") as file:
+            while True:
+                header = file.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                timestamp, direction, length = RECORD_HEADER.unpack(header)
+                payload = file.read(length)
+                if len(payload) < length:
+                    _LOGGER.warning("Truncated record in homee recording %s", file_path)
+                    break
+                yield timestamp, direction, payload.decode("utf-8")
+
+
+async def async_replay(hass: HomeAssistant, homee, path: str, speed: float = 1.0):
+    """Feed the inbound messages of a recording into a homee instance.
+
+    A speed of 1 replays the messages with their recorded timing, higher values
+    accelerate the replay and 0 replays all messages as fast as possible.
+    """
+    records = await hass.async_add_executor_job(
+        lambda: [r for r in read_recording(path) if r[1] == DIRECTION_INBOUND]
+    )
+    _LOGGER.info("Replaying %s homee messages from %s", len(records), path)
+
+    start = time.monotonic()
+    first_timestamp = records[0][0] if records else 0
+    for timestamp, _, msg in records:
+        if speed > 0:
+            delay = (timestamp - first_timestamp) / speed - (time.monotonic() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        # Bypass the recorder, which may be writing to the replayed file
+        await homee.handle_raw_message(msg)
+
+    return len(records)
@@ -0,0 +1,79 @@
+"""Helpers to run the integration against a simulated cube."""
+import asyncio
+import contextlib
+import time
+
+from homeassistant import config_entries
+from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import CoreState, HomeAssistant
+from homeassistant.helpers import (
+    area_registry as ar,
+    device_registry as dr,
+    entity,
+    entity_registry as er,
+    issue_registry as ir,
+    restore_state,
+)
+
+from custom_components.homee.connection import HomeeConnection
+from custom_components.homee.const import DOMAIN
+from custom_components.homee.token_store import async_save_token
+
+from .cube import HOST, UID
+
+
+@contextlib.asynccontextmanager
+async def async_test_home_assistant(config_dir):
+    """Run a minimal Home Assistant that can load the integration."""
+    hass = HomeAssistant()
+    hass.config.config_dir = str(config_dir)
+    hass.config.skip_pip = True
+    # The stream endpoint is the only user of http, it is not started in the tests
+    hass.config.components.add("http")
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+
+    # Same as the registries and helpers loaded by bootstrap
+    entity.async_setup(hass)
+    await ar.async_load(hass)
+    await dr.async_load(hass)
+    await er.async_load(hass)
+    await ir.async_load(hass)
+    await restore_state.async_load(hass)
+    hass.state = CoreState.running
+
+    try:
+        yield hass
+    finally:
+        await hass.async_stop(force=True)
+
+
+async def async_setup_homee(hass: HomeAssistant, options: dict = None):
+    """Add a config entry for the simulated cube and wait until it is set up."""
+    # The simulator does not serve the token endpoint
+    await async_save_token(hass, UID, "token", time.time() + 3600)
+
+    entry = config_entries.ConfigEntry(
+        version=1,
+        domain=DOMAIN,
+        title="Test homee",
+        data={CONF_HOST: HOST, CONF_USERNAME: "user", CONF_PASSWORD: "password"},
+        source=config_entries.SOURCE_USER,
+        options=options or {},
+        unique_id=UID,
+    )
+    await hass.config_entries.async_add(entry)
+    await hass.async_block_till_done()
+    return entry
+
+
+async def async_connect_homee(**attributes) -> HomeeConnection:
+    """Connect to the simulated cube without Home Assistant."""
+    homee = HomeeConnection(HOST, "user", "password", pingInterval=0)
+    # The simulator does not serve the token endpoint
+    homee.token = "token"
+    homee.expires = time.time() + 3600
+    for name, value in attributes.items():
+        setattr(homee, name, value)
+    homee.start()
+    await asyncio.wait_for(homee.wait_until_connected(), 5)
+    return homee
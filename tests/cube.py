@@ -0,0 +1,232 @@
+"""Synthetic homee cube for the tests.
+
+The generator builds the full state of a cube with any number of nodes. The
+simulator serves it on the websocket address pymee connects to and echoes the
+values set by the integration.
+"""
+import asyncio
+import json
+from urllib.parse import parse_qs, urlsplit
+
+from pymee.const import AttributeType, NodeProfile
+import websockets
+
+HOST = "127.0.0.1"
+PORT = 7681
+UID = "0123456789ab"
+
+# The profile and the attribute types and units of the generated nodes,
+# one kind of node per platform
+NODE_KINDS = [
+    (
+        NodeProfile.DIMMABLE_LIGHT,
+        [(AttributeType.ON_OFF, "n%2Fa"), (AttributeType.DIMMING_LEVEL, "%25")],
+    ),
+    (
+        NodeProfile.METERING_PLUG,
+        [
+            (AttributeType.ON_OFF, "n%2Fa"),
+            (AttributeType.CURRENT_ENERGY_USE, "W"),
+            (AttributeType.ACCUMULATED_ENERGY_USE, "kWh"),
+        ],
+    ),
+    (NodeProfile.OPEN_CLOSE_SENSOR, [(AttributeType.OPEN_CLOSE, "n%2Fa")]),
+    (
+        NodeProfile.RADIATOR_THERMOSTAT,
+        [
+            (AttributeType.TEMPERATURE, "%C2%B0C"),
+            (AttributeType.TARGET_TEMPERATURE, "%C2%B0C"),
+        ],
+    ),
+    (
+        NodeProfile.SHUTTER_POSITION_SWITCH,
+        [(AttributeType.UP_DOWN, "n%2Fa"), (AttributeType.POSITION, "%25")],
+    ),
+]
+
+EDITABLE_TYPES = {
+    AttributeType.ON_OFF,
+    AttributeType.DIMMING_LEVEL,
+    AttributeType.TARGET_TEMPERATURE,
+    AttributeType.UP_DOWN,
+    AttributeType.POSITION,
+}
+
+
+def make_attribute(
+    attribute_id: int, node_id: int, attribute_type: int, unit: str = "n%2Fa"
+) -> dict:
+    """Build the payload of an attribute."""
+    return {
+        "id": attribute_id,
+        "node_id": node_id,
+        "instance": 0,
+        "minimum": 0,
+        "maximum": 100,
+        "current_value": 0.0,
+        "target_value": 0.0,
+        "last_value": 0.0,
+        "unit": unit,
+        "step_value": 1.0,
+        "editable": int(attribute_type in EDITABLE_TYPES),
+        "type": attribute_type,
+        "state": 1,
+        "last_changed": 1700000000,
+        "changed_by": 1,
+        "changed_by_id": 0,
+        "based_on": 1,
+        "name": "",
+        "data": "",
+        "options": {},
+    }
+
+
+def make_node(node_id: int) -> dict:
+    """Build the payload of a node. The kind of node cycles with the id."""
+    profile, attributes = NODE_KINDS[node_id % len(NODE_KINDS)]
+    return {
+        "id": node_id,
+        "name": f"Node%20{node_id}",
+        "profile": profile,
+        "image": "default",
+        "favorite": 0,
+        "order": node_id,
+        "protocol": 1,
+        "routing": 0,
+        "state": 1,
+        "state_changed": 1700000000,
+        "added": 1700000000,
+        "history": 1,
+        "cube_type": 1,
+        "note": "",
+        "services": 7,
+        "phonetic_name": "",
+        "owner": 2,
+        "security": 0,
+        "attributes": [
+            make_attribute(node_id * 10 + i, node_id, attribute_type, unit)
+            for i, (attribute_type, unit) in enumerate(attributes)
+        ],
+    }
+
+
+def make_full_state(node_count: int, groups: int = 1) -> dict:
+    """Build the full state message of a cube with the given number of nodes."""
+    nodes = [make_node(i) for i in range(1, node_count + 1)]
+    return {
+        "all": {
+            "settings": {
+                "uid": UID,
+                "homee_name": "Test%20homee",
+                "version": "2.41.0",
+                "webhooks_key": "secret-webhooks-key",
+                "wlan_ssid": "secret-ssid",
+                "lan_ip_address": "192.168.1.2",
+                "latitude": 52.52,
+                "longitude": 13.40,
+            },
+            "nodes": nodes,
+            "groups": [
+                {"id": g, "name": f"Group%20{g}", "image": "", "order": g}
+                for g in range(1, groups + 1)
+            ],
+            "relationships": [
+                {
+                    "id": node["id"],
+                    "group_id": node["id"] % groups + 1,
+                    "node_id": node["id"],
+                    "homeegram_id": 0,
+                    "order": 0,
+                }
+                for node in nodes
+            ],
+            "homeegrams": [{"id": 1, "name": "Good%20night", "active": 1}],
+        }
+    }
+
+
+class CubeSimulator:
+    """Websocket server that answers like a homee cube.
+
+    The full state is sent for GET:all and set values are confirmed with an
+    attribute message. History requests are answered from the history dict,
+    keyed by attribute id, in pages of at most limit points.
+    """
+
+    def __init__(self, full_state: dict) -> None:
+        """Initialize the simulator with the full state it serves."""
+        self.full_state = full_state
+        self.history: dict[int, list[tuple[int, float]]] = {}
+        self.received: list[str] = []
+        self._attributes = {
+            a["id"]: a for n in full_state["all"]["nodes"] for a in n["attributes"]
+        }
+        self.accepted_connections = 0
+        self._server = None
+        self._connections = set()
+
+    async def __aenter__(self) -> "CubeSimulator":
+        self._server = await websockets.serve(
+            self._handler, HOST, PORT, subprotocols=["v2"], max_size=None
+        )
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    @property
+    def connections(self) -> int:
+        """The number of open websocket connections."""
+        return len(self._connections)
+
+    async def drop_connections(self):
+        """Close the open connections like a cube that restarts."""
+        for ws in list(self._connections):
+            ws.transport.abort()
+        await asyncio.sleep(0)
+
+    async def _handler(self, ws: websockets.WebSocketServerProtocol):
+        self._connections.add(ws)
+        self.accepted_connections += 1
+        try:
+            async for msg in ws:
+                self.received.append(msg)
+                response = self.respond(msg)
+                if response is not None:
+                    await ws.send(json.dumps(response))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            self._connections.discard(ws)
+
+    def respond(self, msg: str) -> dict:
+        """Build the response to a message, if any."""
+        method, _, path = msg.partition(":")
+        url = urlsplit(path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        parts = url.path.strip("/").split("/")
+
+        if method == "GET" and parts == ["all"]:
+            return self.full_state
+        if method == "PUT" and "target_value" in query and len(parts) == 4:
+            attribute = self._attributes.get(int(parts[3]))
+            if attribute is None:
+                return None
+            value = float(query["target_value"])
+            attribute.update(current_value=value, target_value=value)
+            return {"attribute": dict(attribute)}
+        if method == "GET" and len(parts) == 5 and parts[4] == "history":
+            points = [
+                p
+                for p in self.history.get(int(parts[3]), [])
+                if int(query["from"]) <= p[0] <= int(query["till"])
+            ][: int(query["limit"])]
+            return {
+                "history": {
+                    "node_id": int(parts[1]),
+                    "attribute_id": int(parts[3]),
+                    "data": [{"timestamp": t, "value": v} for t, v in points],
+                }
+            }
+        return None
@@ -0,0 +1,55 @@
+"""Tests of the aggregates of an attribute type across a homee group."""
+import math
+import random
+from types import SimpleNamespace
+
+from pymee.const import AttributeType
+from pymee.model import HomeeNode
+
+from custom_components.homee.aggregates import GroupAggregate
+
+from .cube import make_full_state
+
+UPDATES = 100_000
+
+
+def _make_aggregate() -> GroupAggregate:
+    nodes = [HomeeNode(n) for n in make_full_state(50)["all"]["nodes"]]
+    group = SimpleNamespace(id=1, name="Group", nodes=nodes)
+    return GroupAggregate(group, AttributeType.CURRENT_ENERGY_USE)
+
+
+def test_sum_without_rounding_errors():
+    """The sum does not drift over many updates."""
+    aggregate = _make_aggregate()
+    rng = random.Random(1)
+    attribute_ids = [a.id for a in aggregate.attributes]
+
+    values = {}
+    for _ in range(UPDATES):
+        attribute_id = rng.choice(attribute_ids)
+        values[attribute_id] = round(rng.uniform(0, 3000), 1)
+        aggregate.update(attribute_id, values[attribute_id])
+
+    assert math.isclose(aggregate.sum, math.fsum(values.values()), abs_tol=1e-9)
+
+    for attribute_id in attribute_ids:
+        aggregate.update(attribute_id, 0.0)
+
+    assert aggregate.sum == 0.0
+    assert not aggregate.any
+
+
+def test_min_max_after_removing_an_extreme():
+    """The extremes are recalculated when the value holding them changes."""
+    aggregate = _make_aggregate()
+    first, second = (a.id for a in aggregate.attributes[:2])
+
+    aggregate.update(first, 100.0)
+    aggregate.update(second, 50.0)
+    assert aggregate.max == 100.0
+
+    aggregate.update(first, 10.0)
+    assert aggregate.max == 50.0
+    assert aggregate.min == 0.0
+    assert aggregate.sum == 60.0
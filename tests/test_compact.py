@@ -0,0 +1,76 @@
+"""Tests of the compact node model."""
+import copy
+import logging
+from unittest.mock import patch
+
+from custom_components.homee.compact import (
+    CompactNode,
+    compact_message,
+    compact_node,
+    get_raw_data,
+)
+from custom_components.homee.const import CONF_COMPACT_MODEL
+
+from .common import async_connect_homee, async_setup_homee, async_test_home_assistant
+from .cube import CubeSimulator, make_full_state, make_node
+
+
+def test_compact_node_keeps_all_fields():
+    """All fields are kept, including the ones the integration does not know."""
+    data = make_node(1)
+    data["new_field"] = {"a": 1}
+    data["attributes"][0]["options"] = {"can_observe": [300]}
+
+    node = CompactNode(copy.deepcopy(data), {})
+
+    assert node.full() == data
+    assert node["new_field"] == {"a": 1}
+    assert len(node) == len(data)
+
+
+def test_options_shared_per_model():
+    """Equal options are shared within a model, not with other models."""
+    shared_options = {}
+    msg = make_full_state(3)
+    for node in msg["all"]["nodes"]:
+        node["attributes"][0]["options"] = {"reverse_control_ui": True}
+
+    nodes = compact_message(msg, shared_options)["all"]["nodes"]
+    other_node = make_node(1)
+    other_node["attributes"][0]["options"] = {"reverse_control_ui": True}
+    other = compact_node(other_node, {})
+
+    options = {id(n.attributes[0].options) for n in nodes}
+    assert len(options) == 1
+    assert {"reverse_control_ui": True} in shared_options.values()
+    assert id(other.attributes[0].options) not in options
+
+
+async def test_compact_connection():
+    """A connection with the compact model keeps the payloads of a large cube."""
+    full_state = make_full_state(500)
+    async with CubeSimulator(copy.deepcopy(full_state)):
+        homee = await async_connect_homee(compact_model=True)
+
+        assert isinstance(homee.nodes[0]._data, CompactNode)
+        assert get_raw_data(homee.get_node_by_id(7)) == full_state["all"]["nodes"][6]
+        await homee.async_disconnect()
+
+
+async def test_node_log_skipped_without_info(tmp_path):
+    """The raw payloads are not rebuilt for the node log if INFO is not logged."""
+    logger = logging.getLogger("custom_components.homee")
+    level = logger.level
+    logger.setLevel(logging.WARNING)
+    try:
+        async with async_test_home_assistant(tmp_path) as hass, CubeSimulator(
+            make_full_state(10)
+        ):
+            with patch(
+                "custom_components.homee.get_raw_data", wraps=get_raw_data
+            ) as raw_data:
+                await async_setup_homee(hass, {CONF_COMPACT_MODEL: True})
+
+            assert raw_data.call_count == 0
+    finally:
+        logger.setLevel(level)
@@ -0,0 +1,57 @@
+"""Tests of the websocket connection against a simulated cube."""
+import asyncio
+import time
+
+from custom_components.homee.tracing import STAGE_DROPPED, STAGE_ENTITY, STAGE_SEND
+
+from .common import async_connect_homee
+from .cube import CubeSimulator, make_full_state
+
+
+async def test_disconnect_closes_websocket():
+    """The disconnect does not wait for a message from a quiet cube."""
+    async with CubeSimulator(make_full_state(5)) as cube:
+        homee = await async_connect_homee()
+
+        start = time.monotonic()
+        await homee.async_disconnect()
+
+        assert time.monotonic() - start < 1
+        assert homee._run_task.done()
+        await asyncio.sleep(0.1)
+        assert cube.connections == 0
+
+
+async def test_command_during_full_state_keeps_full_state():
+    """A command sent while a large full state is decoded does not drop it."""
+    full_state = make_full_state(500)
+    async with CubeSimulator(full_state):
+        homee = await async_connect_homee()
+
+        # Ask for the full state again, as after a reconnect, with a changed value
+        attribute = full_state["all"]["nodes"][0]["attributes"][0]
+        attribute.update(current_value=42.0, target_value=42.0)
+        await homee.send("GET:all")
+        for _ in range(50):
+            await homee.set_value(2, 20, 1.0)
+            await asyncio.sleep(0.005)
+        await asyncio.sleep(0.5)
+
+        assert homee.get_attribute_by_id(attribute["id"]).current_value == 42.0
+        await homee.async_disconnect()
+
+
+async def test_command_trace_send_and_dropped():
+    """Only commands written to the connection are traced as sent."""
+    async with CubeSimulator(make_full_state(5)):
+        homee = await async_connect_homee()
+
+        sent = homee.tracer.start(1, 10, 1.0, STAGE_ENTITY)
+        await homee.set_value(1, 10, 1.0)
+        await homee.async_disconnect()
+        dropped = homee.tracer.start(1, 10, 0.0, STAGE_ENTITY)
+        await homee.set_value(1, 10, 0.0)
+
+        assert sent.has_stage(STAGE_SEND)
+        assert not dropped.has_stage(STAGE_SEND)
+        assert dropped.has_stage(STAGE_DROPPED)
@@ -0,0 +1,23 @@
+"""Tests of the diagnostics of a homee entry."""
+import asyncio
+
+from custom_components.homee.diagnostics import async_get_config_entry_diagnostics
+
+from .common import async_setup_homee, async_test_home_assistant
+from .cube import CubeSimulator, make_full_state
+
+
+async def test_setup_total_is_fixed(tmp_path):
+    """The total setup time does not change after the setup is complete."""
+    async with async_test_home_assistant(tmp_path) as hass, CubeSimulator(
+        make_full_state(10)
+    ):
+        entry = await async_setup_homee(hass)
+
+        first = await async_get_config_entry_diagnostics(hass, entry)
+        await asyncio.sleep(0.05)
+        second = await async_get_config_entry_diagnostics(hass, entry)
+
+        assert first["setup"]["total"] is not None
+        assert first["setup"]["total"] == second["setup"]["total"]
+        assert first["setup"]["total"] >= first["setup"]["phases"]["platforms"]
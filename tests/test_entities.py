@@ -0,0 +1,41 @@
+"""Tests of the entities created for a simulated cube."""
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.homee.const import (
+    CONF_AGGREGATE_GROUPS,
+    CONF_EXCLUDE_ATTRIBUTE_TYPES,
+)
+
+from .common import async_setup_homee, async_test_home_assistant
+from .cube import UID, CubeSimulator, make_full_state
+
+
+async def test_cube_wide_unique_ids(tmp_path):
+    """Groups and homeegrams are scoped to the homee, their ids repeat across cubes."""
+    async with async_test_home_assistant(tmp_path) as hass, CubeSimulator(
+        make_full_state(10)
+    ):
+        await async_setup_homee(hass, {CONF_AGGREGATE_GROUPS: "1"})
+
+        unique_ids = {e.unique_id for e in er.async_get(hass).entities.values()}
+        assert f"{UID}-homeegram-1" in unique_ids
+        assert f"{UID}-group-1-sum-3" in unique_ids
+        assert f"{UID}-group-1-any-14" in unique_ids
+
+
+async def test_excluded_attribute_types_on_all_platforms(tmp_path):
+    """Entities of a whole node are skipped if their state attribute is excluded."""
+    async with async_test_home_assistant(tmp_path) as hass, CubeSimulator(
+        make_full_state(10)
+    ):
+        await async_setup_homee(
+            hass,
+            {
+                CONF_EXCLUDE_ATTRIBUTE_TYPES: (
+                    "ON_OFF, OPEN_CLOSE, TARGET_TEMPERATURE, UP_DOWN"
+                )
+            },
+        )
+
+        domains = {e.domain for e in er.async_get(hass).entities.values()}
+        assert domains == {"scene", "sensor"}
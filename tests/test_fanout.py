@@ -0,0 +1,51 @@
+"""Tests of the local read-only stream of the homee messages."""
+import asyncio
+from unittest.mock import MagicMock
+
+from homeassistant.exceptions import Unauthorized
+import pytest
+
+from custom_components.homee.fanout import FanoutHub, HomeeFanoutView, get_full_state
+
+from .common import async_connect_homee
+from .cube import UID, CubeSimulator, make_full_state
+
+
+async def test_full_state_without_secrets():
+    """The full state for the consumers does not contain the secret settings."""
+    async with CubeSimulator(make_full_state(5)):
+        homee = await async_connect_homee()
+
+        settings = get_full_state(homee)["all"]["settings"]
+
+        assert settings["uid"] == UID
+        for key in ("webhooks_key", "wlan_ssid", "lan_ip_address", "latitude"):
+            assert settings[key] == "**REDACTED**"
+        assert homee.settings.webhooks_key == "secret-webhooks-key"
+        await homee.async_disconnect()
+
+
+async def test_published_full_state_without_secrets():
+    """A full state sent after the connection is set up is redacted as well."""
+    async with CubeSimulator(make_full_state(5)):
+        homee = await async_connect_homee(fanout=FanoutHub())
+        queue = homee.fanout.subscribe()
+
+        await homee.send("GET:all")
+        data = await asyncio.wait_for(queue.get(), 5)
+
+        assert '"all"' in data
+        assert "secret-webhooks-key" not in data
+        assert "secret-ssid" not in data
+        assert "192.168.1.2" not in data
+        assert homee.settings.webhooks_key == "secret-webhooks-key"
+        await homee.async_disconnect()
+
+
+async def test_stream_requires_admin():
+    """Only admin users can open the stream."""
+    request = MagicMock()
+    request.__getitem__.return_value.is_admin = False
+
+    with pytest.raises(Unauthorized):
+        await HomeeFanoutView().get(request, UID)
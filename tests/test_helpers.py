@@ -0,0 +1,21 @@
+"""Tests of the shared helpers."""
+from pymee.const import AttributeType, NodeProfile
+
+from custom_components.homee.helpers import (
+    ATTRIBUTE_TYPE_NAMES,
+    NODE_PROFILE_NAMES,
+    parse_id_list,
+)
+
+
+def test_parse_id_list():
+    """Ids and names are mixed, unknown values are skipped."""
+    assert parse_id_list("1, on_off, ,UNKNOWN", ATTRIBUTE_TYPE_NAMES) == [
+        1,
+        AttributeType.ON_OFF,
+    ]
+    assert parse_id_list("DIMMABLE_LIGHT,10", NODE_PROFILE_NAMES) == [
+        NodeProfile.DIMMABLE_LIGHT,
+        10,
+    ]
+    assert parse_id_list("3, ON_OFF") == [3]
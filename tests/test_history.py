@@ -0,0 +1,161 @@
+"""Tests of the import of the homee history into long-term statistics."""
+import time
+from unittest.mock import patch
+
+from homeassistant.exceptions import HomeAssistantError
+import pytest
+import voluptuous as vol
+
+from custom_components.homee.connection import HomeeNotConnectedException
+from custom_components.homee.const import DOMAIN, SERVICE_IMPORT_HISTORY
+from custom_components.homee.history import HOUR, HourlyDownsampler
+
+from .common import async_setup_homee, async_test_home_assistant
+from .cube import UID, CubeSimulator, make_full_state
+
+ENERGY_SENSOR = "sensor.node_1_energy"
+ENERGY_ATTRIBUTE = 12
+ENERGY_STATISTIC = f"{DOMAIN}:{UID}_1_{ENERGY_ATTRIBUTE}"
+START = 1700000000 - 1700000000 % HOUR
+
+
+def test_downsampler_total_increasing():
+    """Hours get the last value and the sum, a meter reset starts from zero."""
+    downsampler = HourlyDownsampler(True)
+
+    statistics = downsampler.add(
+        [
+            (START, 10.0),
+            (START + 1800, 12.0),
+            (START + HOUR, 15.0),
+            (START + HOUR + 60, 2.0),
+        ]
+    )
+    statistics += downsampler.flush(START + 2 * HOUR)
+
+    assert [(s["state"], s["sum"]) for s in statistics] == [(12.0, 2.0), (2.0, 7.0)]
+    assert downsampler.state == {"last_value": 2.0, "sum": 7.0}
+
+
+def test_downsampler_mean():
+    """Hours of a measurement get the mean, min and max."""
+    downsampler = HourlyDownsampler(False)
+
+    downsampler.add([(START, 100.0), (START + 900, 300.0)])
+    (statistic,) = downsampler.add([(START + HOUR, 0.0)])
+
+    assert (statistic["mean"], statistic["min"], statistic["max"]) == (200, 100, 300)
+    assert downsampler.pending_hour == START + HOUR
+
+
+def test_downsampler_hour_across_pages():
+    """An hour split over two pages is only completed once."""
+    downsampler = HourlyDownsampler(True)
+
+    assert downsampler.add([(START, 1.0), (START + 600, 2.0)]) == []
+    assert downsampler.add([(START + 1200, 3.0)]) == []
+    (statistic,) = downsampler.add([(START + HOUR, 4.0)])
+
+    assert statistic["state"] == 3.0
+    assert downsampler.flush(START + HOUR + 1800) == []
+
+
+def test_downsampler_resume():
+    """A downsampler resumed from the saved state continues the sum."""
+    first = HourlyDownsampler(True)
+    first.add([(START, 1.0), (START + HOUR, 3.0), (START + 2 * HOUR, 4.0)])
+
+    resumed = HourlyDownsampler(True, first.state)
+    (statistic,) = resumed.add([(START + 2 * HOUR, 4.0), (START + 3 * HOUR, 6.0)])
+
+    assert statistic["sum"] == 3.0
+
+
+def _energy_history(hours: int) -> list[tuple[int, float]]:
+    """Points every 15 minutes that end in the previous hour."""
+    end = int(time.time()) // HOUR * HOUR - 1
+    return [(end - i * 900, round(1000 - i * 0.25, 2)) for i in range(hours * 4)][::-1]
+
+
+async def _async_import(hass, imported: list, **data) -> dict:
+    """Call the import service and collect the imported statistics."""
+
+    def add_statistics(_hass, metadata, statistics):
+        assert metadata["source"] == DOMAIN
+        assert metadata["statistic_id"] == ENERGY_STATISTIC
+        imported.extend(statistics)
+
+    with patch(
+        "custom_components.homee.history.async_add_external_statistics",
+        side_effect=add_statistics,
+    ):
+        return await hass.services.async_call(
+            DOMAIN,
+            SERVICE_IMPORT_HISTORY,
+            {"entity_id": ENERGY_SENSOR, **data},
+            blocking=True,
+            return_response=True,
+        )
+
+
+async def test_import_history_resume(tmp_path):
+    """An interrupted import continues after the last completed hour."""
+    async with async_test_home_assistant(tmp_path) as hass, CubeSimulator(
+        make_full_state(5)
+    ) as cube:
+        cube.history[ENERGY_ATTRIBUTE] = _energy_history(24)
+        entry = await async_setup_homee(hass)
+        homee = hass.data[DOMAIN][entry.entry_id]
+
+        complete = []
+        response = await _async_import(hass, complete, days=2, page_size=10)
+        assert len(complete) == 24
+        assert response["statistic_id"] == ENERGY_STATISTIC
+
+        # Lose the connection after three pages
+        get_history = homee.get_attribute_history
+        pages = 0
+
+        async def interrupted(*args):
+            nonlocal pages
+            pages += 1
+            if pages > 3:
+                raise HomeeNotConnectedException()
+            return await get_history(*args)
+
+        partial = []
+        homee.get_attribute_history = interrupted
+        with pytest.raises(HomeAssistantError):
+            await _async_import(hass, partial, days=2, page_size=10, restart=True)
+        homee.get_attribute_history = get_history
+
+        resumed = []
+        await _async_import(hass, resumed, days=2, page_size=10)
+
+        assert len(partial) == 7
+        assert partial + resumed == complete
+
+
+async def test_import_history_rejects_empty_pages(tmp_path):
+    """Pages and periods of zero are rejected by the service schema."""
+    async with async_test_home_assistant(tmp_path) as hass, CubeSimulator(
+        make_full_state(5)
+    ):
+        await async_setup_homee(hass)
+
+        with pytest.raises(vol.Invalid):
+            await _async_import(hass, [], page_size=0)
+        with pytest.raises(vol.Invalid):
+            await _async_import(hass, [], days=0)
+
+
+async def test_import_history_disconnected(tmp_path):
+    """The import fails right away with an error while homee is disconnected."""
+    async with async_test_home_assistant(tmp_path) as hass, CubeSimulator(
+        make_full_state(5)
+    ):
+        entry = await async_setup_homee(hass)
+        await hass.data[DOMAIN][entry.entry_id].async_disconnect()
+
+        with pytest.raises(HomeAssistantError, match="not connected"):
+            await _async_import(hass, [], days=1)
@@ -0,0 +1,145 @@
+"""Timing tests of the node lookups and the platform setup on large homees.
+
+The model is built from the full state of the synthetic cube without a
+websocket, so the tests run in a few seconds even with 5,000 nodes.
+"""
+import json
+import time
+from types import SimpleNamespace
+
+from homeassistant import config_entries
+import pytest
+
+from custom_components.homee import (
+    binary_sensor,
+    climate,
+    cover,
+    light,
+    scene,
+    sensor,
+    switch,
+)
+from custom_components.homee.connection import HomeeConnection
+from custom_components.homee.const import CONF_AGGREGATE_GROUPS, DOMAIN
+from custom_components.homee.helpers import SetupTimer, get_imported_nodes
+
+from .cube import HOST, UID, make_full_state
+
+NODE_COUNTS = [10, 100, 1000, 5000]
+REPEATS = 5
+
+# Allowed growth of the time per node between two node counts. Quadratic
+# code is at least ten times slower per node from 100 to 1,000 nodes and five
+# times from 1,000 to 5,000 nodes.
+MAX_SLOWDOWN_PER_NODE = 3
+
+
+async def _async_build_homee(node_count: int):
+    """Build the model of a cube and the Home Assistant objects of its entry."""
+    homee = HomeeConnection(HOST, "user", "password")
+    await homee.handle_raw_message(json.dumps(make_full_state(node_count)))
+    homee.setup_timer = SetupTimer()
+
+    entry = config_entries.ConfigEntry(
+        version=1,
+        domain=DOMAIN,
+        title="Test homee",
+        data={},
+        source=config_entries.SOURCE_USER,
+        options={CONF_AGGREGATE_GROUPS: "1"},
+        unique_id=UID,
+    )
+    hass = SimpleNamespace(data={DOMAIN: {entry.entry_id: homee}})
+    return homee, hass, entry
+
+
+def _best_time(func) -> float:
+    """The fastest of a few runs, which is the least disturbed by the machine."""
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+async def _async_best_time(func) -> float:
+    """The fastest of a few runs of a coroutine function."""
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        await func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def _assert_near_linear(times: dict[int, float]):
+    """Compare the time per node of each node count with the next smaller one."""
+    per_node = {n: t / n for n, t in times.items()}
+    for smaller, larger in zip(NODE_COUNTS, NODE_COUNTS[1:]):
+        assert per_node[larger] <= MAX_SLOWDOWN_PER_NODE * per_node[smaller], times
+
+
+async def test_get_imported_nodes():
+    """The imported nodes are found in linear time."""
+    times = {}
+    for node_count in NODE_COUNTS:
+        homee, hass, entry = await _async_build_homee(node_count)
+        assert len(get_imported_nodes(hass, entry)) == node_count
+        times[node_count] = _best_time(lambda: get_imported_nodes(hass, entry))
+
+    _assert_near_linear(times)
+
+
+async def test_get_light_attribute_sets():
+    """The light attributes of all nodes are grouped in linear time."""
+    times = {}
+    for node_count in NODE_COUNTS:
+        homee, _, _ = await _async_build_homee(node_count)
+        nodes = [n for n in homee.nodes if light.is_light_node(n)]
+        assert len(nodes) == node_count // 5
+
+        def get_all_sets():
+            for node in nodes:
+                light.get_light_attribute_sets(node)
+
+        times[node_count] = _best_time(get_all_sets)
+
+    _assert_near_linear(times)
+
+
+async def test_get_node_by_id():
+    """Looking up every node by id takes linear time, a lookup constant time."""
+    times = {}
+    for node_count in NODE_COUNTS:
+        homee, _, _ = await _async_build_homee(node_count)
+        node_ids = [n.id for n in homee.nodes]
+        assert homee.get_node_by_id(node_count).id == node_count
+
+        def get_all_nodes():
+            for node_id in node_ids:
+                homee.get_node_by_id(node_id)
+
+        times[node_count] = _best_time(get_all_nodes)
+
+    _assert_near_linear(times)
+
+
+@pytest.mark.parametrize(
+    "platform", [binary_sensor, climate, cover, light, scene, sensor, switch]
+)
+async def test_platform_setup(platform):
+    """Each platform creates its entities in linear time."""
+    times = {}
+    for node_count in NODE_COUNTS:
+        _, hass, entry = await _async_build_homee(node_count)
+        entities = []
+
+        async def setup():
+            entities.clear()
+            await platform.async_setup_entry(hass, entry, entities.extend)
+
+        times[node_count] = await _async_best_time(setup)
+        assert entities
+
+    _assert_near_linear(times)
@@ -0,0 +1,27 @@
+"""Tests of the services of the integration."""
+from homeassistant.core import HassJobType
+
+from custom_components.homee.const import DOMAIN, SERVICE_GET_VALUES
+
+from .common import async_setup_homee, async_test_home_assistant
+from .cube import CubeSimulator, make_full_state
+
+
+async def test_get_values(tmp_path):
+    """get_values reads the model in the event loop."""
+    async with async_test_home_assistant(tmp_path) as hass, CubeSimulator(
+        make_full_state(10)
+    ):
+        await async_setup_homee(hass)
+
+        service = hass.services.async_services()[DOMAIN][SERVICE_GET_VALUES]
+        assert service.job.job_type is HassJobType.Callback
+
+        response = await hass.services.async_call(
+            DOMAIN,
+            SERVICE_GET_VALUES,
+            {"attributes": [{"attribute": 10}, {"node": 2, "type": "OPEN_CLOSE"}]},
+            blocking=True,
+            return_response=True,
+        )
+        assert [v["attribute"] for v in response["values"]] == [10, 20]
@@ -0,0 +1,219 @@
+"""Soak tests of repeated reloads, options changes and reconnects against a simulated cube."""
+import asyncio
+import gc
+import os
+import threading
+import tracemalloc
+import weakref
+
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity_component import DATA_INSTANCES
+from homeassistant.helpers.entity_platform import DATA_ENTITY_PLATFORM
+from pymee.const import NodeProfile
+import pytest
+
+from custom_components.homee.connection import HomeeConnection
+from custom_components.homee.const import (
+    CONF_AGGREGATE_GROUPS,
+    CONF_COMPACT_MODEL,
+    CONF_EXCLUDE_PROFILES,
+    CONF_IO_THREAD,
+    DOMAIN,
+)
+
+from .common import async_setup_homee, async_test_home_assistant
+from .cube import CubeSimulator, make_full_state
+
+CYCLES = int(os.environ.get("HOMEE_SOAK_CYCLES", 200))
+WARMUP_CYCLES = 20
+NODES = 50
+
+# Allowed growth of the traced memory per cycle after the warmup, leaking a
+# single entity or node payload per cycle exceeds it
+MAX_MEMORY_GROWTH_PER_CYCLE = 4 * 1024
+
+OPTIONS = pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {CONF_AGGREGATE_GROUPS: "1", CONF_COMPACT_MODEL: True},
+        {CONF_IO_THREAD: True},
+    ],
+    ids=["default", "compact_aggregates", "io_thread"],
+)
+
+
+def _count_bus_listeners(hass) -> int:
+    return sum(hass.bus.async_listeners().values())
+
+
+def _count_node_listeners(homee: HomeeConnection) -> int:
+    return sum(len(n._onChangedListeners) for n in homee.nodes)
+
+
+def _count_connections() -> int:
+    return sum(isinstance(o, HomeeConnection) for o in gc.get_objects())
+
+
+def _drop_unloaded_platforms(hass):
+    # Home Assistant 2023.8 keeps the entity platforms of unloaded entries,
+    # only the entity components know the platforms in use
+    in_use = {
+        id(p)
+        for component in hass.data.get(DATA_INSTANCES, {}).values()
+        for p in component._platforms.values()
+    }
+    platforms = hass.data.get(DATA_ENTITY_PLATFORM, {}).get(DOMAIN, [])
+    platforms[:] = [p for p in platforms if id(p) in in_use]
+
+
+async def _async_wait_for(condition):
+    async def wait():
+        while not condition():
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(wait(), 5)
+
+
+class Baseline:
+    """Traced memory, tasks, threads and bus listeners after the warmup.
+
+    The memory is traced from the start of the warmup, so the objects that are
+    replaced in every cycle are traced when the baseline is measured.
+    """
+
+    def __init__(self) -> None:
+        """Start tracing the memory."""
+        tracemalloc.start()
+
+    def measure(self, hass):
+        """Measure the memory and count the resources in use."""
+        gc.collect()
+        self.memory = tracemalloc.get_traced_memory()[0]
+        self.tasks = len(asyncio.all_tasks())
+        self.threads = threading.active_count()
+        self.bus_listeners = _count_bus_listeners(hass)
+
+    def assert_flat(self, hass, entry):
+        """Check that the memory and resources did not grow with the cycles."""
+        gc.collect()
+        growth = tracemalloc.get_traced_memory()[0] - self.memory
+        tracemalloc.stop()
+
+        cycles = CYCLES - WARMUP_CYCLES
+        entities = len(
+            er.async_entries_for_config_entry(er.async_get(hass), entry.entry_id)
+        )
+        print(
+            f"Memory growth over {cycles} cycles: {growth} bytes, "
+            f"{growth / NODES:.0f} per node, {growth / entities:.0f} per entity"
+        )
+
+        assert growth < MAX_MEMORY_GROWTH_PER_CYCLE * cycles
+        assert len(asyncio.all_tasks()) == self.tasks
+        assert threading.active_count() <= self.threads
+        assert _count_bus_listeners(hass) <= self.bus_listeners
+
+
+@OPTIONS
+async def test_setup_unload_cycles(tmp_path, options):
+    """Memory, tasks, threads and listeners stay flat over many reloads."""
+    connections = weakref.WeakSet()
+
+    async with async_test_home_assistant(tmp_path) as hass, CubeSimulator(
+        make_full_state(NODES)
+    ):
+        entry = await async_setup_homee(hass, options)
+        await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+        baseline = Baseline()
+        for cycle in range(CYCLES):
+            if cycle == WARMUP_CYCLES:
+                baseline.measure(hass)
+
+            assert await hass.config_entries.async_setup(entry.entry_id)
+            await hass.async_block_till_done()
+            homee: HomeeConnection = hass.data[DOMAIN][entry.entry_id]
+            connections.add(homee)
+            assert homee.connected
+
+            assert await hass.config_entries.async_unload(entry.entry_id)
+            await hass.async_block_till_done()
+            _drop_unloaded_platforms(hass)
+            assert homee._run_task.done()
+            assert _count_node_listeners(homee) == 0
+            assert not hass.services.async_services().get(DOMAIN)
+            del homee
+
+        gc.collect()
+        assert not connections
+        baseline.assert_flat(hass, entry)
+
+
+@OPTIONS
+async def test_options_change_cycles(tmp_path, options):
+    """Memory, tasks, threads and listeners stay flat over many options changes."""
+    changed_options = {
+        **options,
+        CONF_EXCLUDE_PROFILES: str(int(NodeProfile.OPEN_CLOSE_SENSOR)),
+    }
+
+    async with async_test_home_assistant(tmp_path) as hass, CubeSimulator(
+        make_full_state(NODES)
+    ):
+        entry = await async_setup_homee(hass, options)
+
+        baseline = Baseline()
+        for cycle in range(CYCLES):
+            if cycle == WARMUP_CYCLES:
+                baseline.measure(hass)
+
+            # Each cycle changes the options and reloads the entry, the even
+            # cycles end with the initial options
+            hass.config_entries.async_update_entry(
+                entry, options=changed_options if cycle % 2 == 0 else options
+            )
+            assert await hass.config_entries.async_reload(entry.entry_id)
+            await hass.async_block_till_done()
+            _drop_unloaded_platforms(hass)
+            assert hass.data[DOMAIN][entry.entry_id].connected
+
+        gc.collect()
+        assert _count_connections() == 1
+        baseline.assert_flat(hass, entry)
+
+
+@OPTIONS
+async def test_reconnect_cycles(tmp_path, options):
+    """Memory, tasks, threads and listeners stay flat over many reconnects."""
+    async with async_test_home_assistant(tmp_path) as hass, CubeSimulator(
+        make_full_state(NODES)
+    ) as cube:
+        entry = await async_setup_homee(hass, options)
+        homee: HomeeConnection = hass.data[DOMAIN][entry.entry_id]
+        # Reconnect right away instead of waiting a few seconds
+        homee.reconnectInterval = 0
+        node_listeners = _count_node_listeners(homee)
+
+        baseline = Baseline()
+        for cycle in range(CYCLES):
+            if cycle == WARMUP_CYCLES:
+                baseline.measure(hass)
+
+            # Wait until the full state of the new connection was handled
+            homee.connection_timings.pop("full_state", None)
+            accepted_connections = cube.accepted_connections
+            await cube.drop_connections()
+            await _async_wait_for(
+                lambda: "full_state" in homee.connection_timings
+                and cube.accepted_connections > accepted_connections
+            )
+            await hass.async_block_till_done()
+
+            assert len(homee.nodes) == NODES
+            assert _count_node_listeners(homee) == node_listeners
+
+        gc.collect()
+        assert _count_connections() == 1
+        baseline.assert_flat(hass, entry)